@@ -1,14 +1,19 @@
 """整个服务的入口文件"""
+import time
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 # 导入路由
 from src.router.hotspot.router import router as hotspot_router
+from src.router.hotspot.handler import get_handler
 # from src.router.filekb.router import router as filekb_router  # 知识库路由（待实现）
 
 # 导入Redis客户端
 from src.dbs.redis_stack.init import redis_client
+from src.utils.process_pool import process_pool
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -29,12 +34,21 @@ async def lifespan(app: FastAPI):
 
     # await mongo_client.init_client()  # MongoDB暂时不用管
 
+    # 批量数据编码使用的进程池
+    process_pool.start()
+
+    # 向量化服务的HTTP连接池
+    handler = await get_handler()
+    await handler.embedding_service.start()
+
     yield
 
     # 关闭时的清理工作
     print("🛑 应用关闭中...")
+    process_pool.shutdown()
+    await handler.embedding_service.close()
     try:
-        await redis_client.get_client().close()
+        await redis_client.close()
         print("✅ Redis连接已关闭")
     except Exception as e:
         print(f"⚠️ Redis连接关闭时出现问题: {e}")
@@ -44,7 +58,8 @@ app = FastAPI(
     title="企业AI服务平台",
     description="提供热点问题管理和知识库服务",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # 添加CORS中间件
@@ -77,26 +92,57 @@ async def root():
         }
     }
 
+# 健康检查时Redis ping结果的缓存，避免负载均衡的高频探测打满Redis
+HEALTH_PING_CACHE_SECONDS = 1.0
+HEALTH_PING_TIMEOUT = 0.2
+_last_ping_ok = False
+_last_ping_ts = float("-inf")
+
+
+async def _redis_ping_cached() -> bool:
+    """在缓存时间内直接复用上一次的ping结果"""
+    global _last_ping_ok, _last_ping_ts
+
+    now = time.monotonic()
+    if now - _last_ping_ts < HEALTH_PING_CACHE_SECONDS:
+        return _last_ping_ok
+
+    try:
+        _last_ping_ok = bool(await asyncio.wait_for(redis_client.ping(), timeout=HEALTH_PING_TIMEOUT))
+    except Exception:
+        _last_ping_ok = False
+    _last_ping_ts = now
+    return _last_ping_ok
+
+
 # 全局健康检查
 @app.get("/health", summary="全局健康检查")
 async def global_health():
     """
     全局健康检查接口
     """
+    redis_ok = await _redis_ping_cached()
     return {
-        "status": "healthy",
+        "status": "healthy" if redis_ok else "degraded",
         "services": {
             "hotspot": "active",
-            "filekb": "pending"  # 知识库服务待实现
-        }
+            "filekb": "pending",  # 知识库服务待实现
+            "redis": "active" if redis_ok else "unavailable"
+        },
+        "redis_pool": redis_client.pool_stats()
     }
 
 
 if __name__ == "__main__":
     import uvicorn
+    from src.service.config import my_config
+    # 多worker模式必须以导入字符串的形式传入app
     uvicorn.run(
-        app,
+        "src.app:app",
         host="0.0.0.0",
         port=8060,
+        loop="uvloop",
+        http="httptools",
+        workers=my_config.get_server_config()["workers"],
         log_level="info"
     )
\ No newline at end of file
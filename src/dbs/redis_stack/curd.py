@@ -5,11 +5,16 @@ redis stack的增删改查逻辑 - 进一步优化版
 import redis.asyncio as redis
 import asyncio
 from typing import List, Dict, Any, Optional
-import json
-from datetime import datetime, timedelta
+import numpy as np
+from functools import lru_cache
+from cachetools import TTLCache
+from pydantic import TypeAdapter, ValidationError
 
 from src.utils.logger import logger
+from src.utils.batcher import MicroBatcher
+from src.utils.process_pool import process_pool
 from src.dbs.redis_stack.init import redis_client
+from src.dbs.redis_stack.models import HotspotQuestionDocument
 from src.service.config import my_config
 
 cfg = my_config.get_redis_config()
@@ -18,9 +23,142 @@ assert isinstance(client, redis.Redis)
 
 # 缓存配置
 CACHE_TTL = 300  # 缓存5分钟
-STATS_CACHE_KEY = "hotspot:stats:{group_id}"
 INDEX_STATUS_CACHE = "hotspot:index_status"
 
+# 统计信息随写入增量维护，读取时不再扫描全量数据
+STATS_CATEGORIES_KEY = "stats:{group_id}:categories"
+STATS_TOTAL_KEY = "stats:{group_id}:total"
+STATS_LAST_UPDATED_KEY = "stats:{group_id}:last_updated"
+STATS_SEEDED_KEY = "stats:{group_id}:seeded"  # 计数器已经用全量聚合校准过的标记
+STATS_SEED_TTL = 3600  # 校准标记的有效期，过期后下一次读取统计时重新用全量聚合校准，纠正可能的偏差
+
+# 写入/删除文档和计数器的增减在同一个Lua脚本里原子完成：旧分类在脚本内读取，并发写同一个key也不会重复计数
+# KEYS: 分类计数hash, 总数, 最后更新时间, 文档key...
+# ARGV: 是否NX, 最后更新时间(可为空), 然后每个文档依次是 JSON字符串, 分类
+# 返回: 每个文档一项，1为已写入，0为NX模式下已存在，字符串为redis返回的错误
+_STORE_SCRIPT = client.register_script("""
+local nx = ARGV[1] == '1'
+local results = {}
+local stored = 0
+for i = 4, #KEYS do
+    local j = 3 + (i - 4) * 2
+    local raw = redis.pcall('JSON.GET', KEYS[i], '$.category')
+    local exists = type(raw) == 'string'
+    local old = false
+    if exists then
+        old = cjson.decode(raw)[1]
+        if type(old) ~= 'string' then old = false end
+    end
+
+    local reply
+    if nx then
+        reply = redis.pcall('JSON.SET', KEYS[i], '$', ARGV[j], 'NX')
+    else
+        reply = redis.pcall('JSON.SET', KEYS[i], '$', ARGV[j])
+    end
+
+    if type(reply) == 'table' and reply.err then
+        results[#results + 1] = reply.err
+    elseif reply then
+        local new = ARGV[j + 1]
+        if not exists then
+            redis.call('INCR', KEYS[2])
+            redis.call('HINCRBY', KEYS[1], new, 1)
+        elseif old ~= new then
+            if old then redis.call('HINCRBY', KEYS[1], old, -1) end
+            redis.call('HINCRBY', KEYS[1], new, 1)
+        end
+        stored = stored + 1
+        results[#results + 1] = 1
+    else
+        results[#results + 1] = 0
+    end
+end
+if stored > 0 and ARGV[2] ~= '' then
+    redis.call('SET', KEYS[3], ARGV[2])
+end
+return results
+""")
+
+# 删除文档并按实际删除的文档扣减计数
+# KEYS: 分类计数hash, 总数, 文档key...
+# 返回: 实际删除的数量
+_DELETE_SCRIPT = client.register_script("""
+local deleted = 0
+for i = 3, #KEYS do
+    local raw = redis.pcall('JSON.GET', KEYS[i], '$.category')
+    if redis.call('UNLINK', KEYS[i]) == 1 then
+        deleted = deleted + 1
+        if type(raw) == 'string' then
+            local old = cjson.decode(raw)[1]
+            if type(old) == 'string' then redis.call('HINCRBY', KEYS[1], old, -1) end
+        end
+    end
+end
+if deleted > 0 then redis.call('DECRBY', KEYS[2], deleted) end
+return deleted
+""")
+
+# 单次脚本调用处理的文档数量上限，脚本执行期间redis不处理其他命令，大批量拆成多次调用
+STATS_SCRIPT_BATCH = 256
+
+# 列表翻页游标的最长空闲时间(毫秒)，调用方不再翻页时游标尽快在redis中过期，不占用索引的游标配额
+LIST_CURSOR_MAX_IDLE_MS = 60000
+
+# 列表查询固定LOAD的字段
+_LIST_LOAD = (
+    'LOAD', '8', '@__key', '@question', '@standard_reply', '@category',
+    '@question_id', '@related_links', '@created_at', '@updated_at',
+)
+
+# 按分类删除时每一页取回的key数量
+DELETE_BATCH_SIZE = 10000
+
+# 批量存储超过该数量时，校验和序列化放到进程池中执行
+ENCODE_OFFLOAD_THRESHOLD = 256
+
+# 整批问题数据一次交给pydantic-core校验
+_BATCH_ADAPTER = TypeAdapter(List[HotspotQuestionDocument])
+
+
+def _document_json(document: HotspotQuestionDocument) -> str:
+    """
+    单条和批量写入共用的序列化：只写入输入中出现过的字段，hit_count这类模型默认值不额外落库；
+    分类是索引和统计计数依赖的字段，输入缺省时也写入默认值
+    """
+    return document.model_dump_json(include=document.model_fields_set | {'category'})
+
+# 进程内的问题文档缓存，热点问题重复读取时不再访问redis
+# 只有本进程的写入会失效缓存，其他worker的修改最多延迟DOC_CACHE_TTL秒可见，依赖最新数据的读取用use_cache=False；
+# 每条文档带1024维向量(约33KB)，条数上限控制在每个worker几十MB以内
+DOC_CACHE_TTL = 60
+_doc_cache = TTLCache(maxsize=1000, ttl=DOC_CACHE_TTL)
+
+# 向量维度与embedding模型保持一致
+VECTOR_DIM = my_config.get_model_config()["embedding"].get("n_dim", 1024)
+
+# 新建向量索引时的元素类型；查询向量必须按索引实际的精度编码，已有索引的类型以FT.INFO为准
+VECTOR_TYPE = cfg.get('vector_type', 'FLOAT16')
+_VECTOR_DTYPES = {'FLOAT32': np.float32, 'FLOAT16': np.float16, 'FLOAT64': np.float64}
+_VECTOR_DTYPE = _VECTOR_DTYPES[VECTOR_TYPE]
+
+# 索引的进程内缓存，避免每次搜索都执行FT.INFO：
+# 索引存在时缓存其向量字段的元素类型(numpy dtype)，不存在时缓存False
+INDEX_EXISTS_CACHE_TTL = 30
+_index_exists_cache = TTLCache(maxsize=1024, ttl=INDEX_EXISTS_CACHE_TTL)
+
+
+async def _execute_pipelined(commands: List[tuple]):
+    """把一批命令放进同一个pipeline执行，单条命令的错误按位置原样返回"""
+    pipe = client.pipeline(transaction=False)
+    for args in commands:
+        pipe.execute_command(*args)
+    return await pipe.execute(raise_on_error=False)
+
+
+# 并发的向量搜索在5ms窗口内合并成一次pipeline
+_search_batcher = MicroBatcher(_execute_pipelined, max_batch_size=64, max_wait=0.005)
+
 # 辅助函数
 
 def parse_search_result(result):
@@ -28,60 +166,83 @@ def parse_search_result(result):
     if not result or len(result) < 2:
         return []
 
-    parsed_results = []
-    for i in range(1, len(result), 2):
-        if i + 1 < len(result):
-            key = result[i]
-            fields = result[i + 1]
+    # result[1:]是key和字段列表交替出现，字段列表本身又是字段名和值交替
+    it = iter(result[1:])
+    return [
+        {'key': key, **dict(zip(fields[0::2], fields[1::2]))}
+        for key, fields in zip(it, it)
+    ]
 
-            result_dict = {'key': key}
-            for j in range(0, len(fields), 2):
-                if j + 1 < len(fields):
-                    field_name = fields[j]
-                    field_value = fields[j + 1]
-                    result_dict[field_name] = field_value
 
-            parsed_results.append(result_dict)
+def _attach_similarity(rows: List[dict], field: str, from_distance: bool):
+    """
+    把rows中field字段的分数批量转换成similarity_score（保留4位小数）
+    分数统一在一次numpy运算里完成，而不是逐行float/round
+    :param from_distance: 分数是否为余弦距离，是则转换为 1 - 距离
+    """
+    scored = [row for row in rows if field in row]
+    if not scored:
+        return
 
-    return parsed_results
+    scores = np.fromiter((row.pop(field) for row in scored), dtype=np.float64, count=len(scored))
+    if from_distance:
+        scores = 1.0 - scores
+    for row, similarity in zip(scored, np.round(scores, 4).tolist()):
+        row['similarity_score'] = similarity
 
 
 def parse_vector_search_result(result):
     """解析向量搜索结果，包含相似度评分"""
-    if not result or len(result) < 2:
-        return []
+    parsed_results = parse_search_result(result)
+    # 转换为相似度（1 - 距离）
+    _attach_similarity(parsed_results, '__vector_score', from_distance=True)
+    return parsed_results
 
-    parsed_results = []
 
-    for i in range(1, len(result), 2):
-        if i + 1 < len(result):
-            key = result[i]
-            fields = result[i + 1]
+def parse_aggregate_result(result):
+    """解析FT.AGGREGATE的结果，每一行都是字段名和值交替的列表"""
+    if not result or len(result) < 2:
+        return []
 
-            result_dict = {'key': key}
-            similarity_score = None
+    parsed_results = [dict(zip(row[0::2], row[1::2])) for row in result[1:]]
+    for row_dict in parsed_results:
+        # LOAD @__key得到的文档key统一放在key字段，与搜索结果保持一致
+        if '__key' in row_dict:
+            row_dict['key'] = row_dict.pop('__key')
 
-            for j in range(0, len(fields), 2):
-                if j + 1 < len(fields):
-                    field_name = fields[j]
-                    field_value = fields[j + 1]
+    return parsed_results
 
-                    if field_name == '__vector_score':
-                        # 转换为相似度（1 - 距离）
-                        similarity_score = 1.0 - float(field_value)
-                    else:
-                        result_dict[field_name] = field_value
 
-            if similarity_score is not None:
-                result_dict['similarity_score'] = round(similarity_score, 4)
+def parse_vector_aggregate_result(result):
+    """解析带相似度过滤的向量聚合结果，输出格式与parse_vector_search_result一致"""
+    parsed_results = parse_aggregate_result(result)
 
-            parsed_results.append(result_dict)
+    for result_dict in parsed_results:
+        result_dict.pop('__vector_score', None)
+    _attach_similarity(parsed_results, 'similarity_score', from_distance=False)
 
     return parsed_results
 
 
 # 索引管理优化
 
+async def _create_index(group_id: str, vector_type: str):
+    await client.execute_command(
+        'FT.CREATE', group_id,
+        'ON', 'JSON',
+        'PREFIX', '1', group_id,
+        'SCHEMA',
+        '$.query_vector', 'AS', 'vector', 'VECTOR', 'FLAT', '6',
+        'TYPE', vector_type, 'DIM', str(VECTOR_DIM),
+        'DISTANCE_METRIC', 'COSINE',
+        '$.category', 'AS', 'category', 'TAG',
+        '$.question', 'AS', 'question', 'TEXT',
+        '$.question_id', 'AS', 'question_id', 'TEXT',
+        '$.created_at', 'AS', 'created_at', 'TEXT',
+        '$.updated_at', 'AS', 'updated_at', 'TEXT'
+    )
+
+
 async def create_hotspot_index(group_id: str, force_recreate: bool = False):
     """
     创建热点问题向量索引
@@ -93,114 +254,184 @@ async def create_hotspot_index(group_id: str, force_recreate: bool = False):
         if not force_recreate:
             cached_status = await client.get(f"{INDEX_STATUS_CACHE}:{group_id}")
             if cached_status == "active":
-                logger.info(f"索引 {group_id} 已存在且正常，跳过创建")
+                # 进程内缓存可能还记着索引不存在，交给下一次FT.INFO重新读取
+                _index_exists_cache.pop(group_id, None)
+                logger.info("索引 %s 已存在且正常，跳过创建", group_id)
                 return True
 
         # 尝试删除旧索引
+        _index_exists_cache.pop(group_id, None)
         try:
             await client.execute_command('FT.DROPINDEX', group_id)
-            logger.info(f"🗑️ 删除旧索引: {group_id}")
+            logger.info("🗑️ 删除旧索引: %s", group_id)
         except Exception:
-            logger.info(f"索引 {group_id} 不存在，准备创建新索引")
-
-        # 创建新索引
-        await client.execute_command(
-            'FT.CREATE', group_id,
-            'ON', 'JSON',
-            'PREFIX', '1', group_id,
-            'SCHEMA',
-            '$.query_vector', 'AS', 'vector', 'VECTOR', 'FLAT', '6',
-            'TYPE', 'FLOAT32', 'DIM', str(cfg.get('n_dim', 1024)),
-            'DISTANCE_METRIC', 'COSINE',
-            '$.category', 'AS', 'category', 'TAG',
-            '$.question', 'AS', 'question', 'TEXT',
-            '$.question_id', 'AS', 'question_id', 'TEXT',
-            '$.created_at', 'AS', 'created_at', 'TEXT',
-            '$.updated_at', 'AS', 'updated_at', 'TEXT'
-        )
+            logger.info("索引 %s 不存在，准备创建新索引", group_id)
+
+        # 创建新索引；旧索引已经删除，RediSearch 2.10以前不支持JSON上的FLOAT16向量，
+        # 配置的类型被拒绝时退回FLOAT32重建，不能让分组停留在没有索引的状态
+        vector_type = VECTOR_TYPE
+        try:
+            await _create_index(group_id, vector_type)
+        except Exception as e:
+            if vector_type == 'FLOAT32':
+                raise
+            logger.warning("索引 %s 以 %s 创建失败(%s)，改用FLOAT32", group_id, vector_type, e)
+            vector_type = 'FLOAT32'
+            await _create_index(group_id, vector_type)
 
         # 缓存索引状态
         await client.setex(f"{INDEX_STATUS_CACHE}:{group_id}", CACHE_TTL, "active")
+        _index_exists_cache[group_id] = _VECTOR_DTYPES[vector_type]
 
-        logger.info(f"✅ 索引 {group_id} 创建成功 (维度: {cfg.get('n_dim', 1024)})")
+        logger.info("✅ 索引 %s 创建成功 (维度: %s, 类型: %s)", group_id, VECTOR_DIM, vector_type)
         return True
 
     except Exception as e:
-        logger.error(f"❌ 索引 {group_id} 创建失败: {e}")
+        logger.error("❌ 索引 %s 创建失败: %s", group_id, e)
         return False
 
 
-async def check_index_exists(group_id: str) -> bool:
-    """检查索引是否存在"""
+def _parse_vector_dtype(info) -> type:
+    """
+    从FT.INFO的attributes里取出向量字段的data_type
+    在FLOAT16改动之前创建的索引是FLOAT32；旧版本RediSearch不返回data_type时也按FLOAT32处理
+    """
+    info = dict(zip(info[0::2], info[1::2])) if isinstance(info, list) else info
+    for attribute in info.get('attributes') or []:
+        fields = dict(zip(attribute[0::2], attribute[1::2])) if isinstance(attribute, list) else attribute
+        if str(fields.get('type', '')).upper() == 'VECTOR':
+            return _VECTOR_DTYPES.get(str(fields.get('data_type', 'FLOAT32')).upper(), np.float32)
+    return np.float32
+
+
+async def _get_index_dtype(group_id: str):
+    """索引向量字段的元素类型，索引不存在时返回None，结果在进程内缓存一段时间"""
+    dtype = _index_exists_cache.get(group_id)
+    if dtype is not None:
+        return dtype or None
+
     try:
-        await client.execute_command('FT.INFO', group_id)
-        return True
+        dtype = _parse_vector_dtype(await client.execute_command('FT.INFO', group_id))
     except Exception:
-        return False
+        dtype = False
+
+    _index_exists_cache[group_id] = dtype
+    return dtype or None
+
+
+async def check_index_exists(group_id: str) -> bool:
+    """检查索引是否存在，结果在进程内缓存一段时间"""
+    return await _get_index_dtype(group_id) is not None
+
+
+async def count_questions(group_id: str) -> int:
+    """通过索引统计分组下的问题数量，只取总数不返回任何文档"""
+    result = await client.execute_command(
+        'FT.SEARCH', group_id, '*',
+        'NOCONTENT', 'LIMIT', '0', '0'
+    )
+    return int(result[0]) if result else 0
 
 
 # 批量操作优化
 
-async def store_hotspot_questions_batch(questions_data: List[Dict], group_id: str):
+async def store_hotspot_questions_batch(questions_data: List[Dict], group_id: str, nx: bool = False):
     """
     批量存储热点问题 - 使用pipeline优化
     :param questions_data: 问题数据列表
     :param group_id: 分组ID
+    :param nx: 只写入不存在的问题，已存在的问题ID记为失败，不覆盖
     :return: (成功数量, 失败数量, 失败详情)
     """
     if not questions_data:
         return 0, 0, []
 
     success_count = 0
-    failed_items = []
 
     try:
-        # 使用pipeline批量操作
-        pipe = client.pipeline()
-
-        # 验证数据格式
-        required_keys = {"query_vector", "category", "question", "question_id"}
-        valid_items = []
-
-        for i, data in enumerate(questions_data):
-            if not isinstance(data, dict) or not required_keys.issubset(data.keys()):
-                failed_items.append({
-                    "index": i,
-                    "question_id": data.get("question_id", f"unknown_{i}"),
-                    "reason": "数据格式不符合要求"
-                })
-                continue
-            valid_items.append((i, data))
-
-        # 批量设置JSON数据
-        for original_index, data in valid_items:
-            key = f"{group_id}{data['question_id']}"
-            pipe.json().set(key, '$', data)
-
-        # 执行批量操作
-        if valid_items:
-            results = await pipe.execute()
+        # 验证数据格式并序列化，批量较大时放到进程池里做
+        executor = process_pool.get_executor()
+        if executor is not None and len(questions_data) > ENCODE_OFFLOAD_THRESHOLD:
+            loop = asyncio.get_running_loop()
+            encoded_items, failed_items = await loop.run_in_executor(
+                executor, _encode_batch, questions_data, group_id
+            )
+        else:
+            encoded_items, failed_items = _encode_batch(questions_data, group_id)
+
+        # 执行批量操作：写入和计数器更新在Lua脚本里原子完成，NX模式下已存在的问题不覆盖
+        if encoded_items:
+            results = await _store_with_stats(
+                group_id,
+                [(key, payload, category) for _, _, key, category, _, payload in encoded_items],
+                nx=nx,
+                last_updated=max(item[4] or '' for item in encoded_items) or None
+            )
 
-            # 处理结果
-            for (original_index, data), result in zip(valid_items, results):
-                if result:  # Redis JSON.SET 成功返回 'OK'
+            for (original_index, question_id, *_), result in zip(encoded_items, results):
+                if result == 1:
                     success_count += 1
                 else:
                     failed_items.append({
                         "index": original_index,
-                        "question_id": data["question_id"],
-                        "reason": "Redis存储失败"
+                        "question_id": question_id,
+                        "reason": f"Redis存储失败: {result}" if isinstance(result, str) else "问题ID已存在"
                     })
 
-        logger.info(f"批量存储完成: 成功 {success_count}, 失败 {len(failed_items)}")
+        logger.info("批量存储完成: 成功 %s, 失败 %s", success_count, len(failed_items))
         return success_count, len(failed_items), failed_items
 
     except Exception as e:
-        logger.error(f"批量存储异常: {e}")
+        logger.error("批量存储异常: %s", e)
+        if nx:
+            # 逐个存储会覆盖已有问题，NX模式下不回退
+            raise
         # 如果批量操作失败，尝试逐个存储
         return await _fallback_store_individual(questions_data, group_id)
 
 
+def _encode_batch(questions_data: List[Dict], group_id: str):
+    """
+    校验并序列化一批问题数据，可能在子进程中执行，所以必须是模块级的纯函数
+    :return: ([(原始索引, 问题ID, key, 分类, 更新时间, JSON字符串)], 失败详情)
+    """
+    failed_items = []
+    valid_indices = list(range(len(questions_data)))
+
+    try:
+        documents = _BATCH_ADAPTER.validate_python(questions_data)
+    except ValidationError as e:
+        # 记录每条不合格数据的第一个错误，剩余数据重新校验一次
+        reasons = {}
+        for error in e.errors():
+            if error['loc'] and isinstance(error['loc'][0], int):
+                field = '.'.join(str(part) for part in error['loc'][1:])
+                detail = f"{field} {error['msg']}" if field else error['msg']
+                reasons.setdefault(error['loc'][0], f"数据格式不符合要求: {detail}")
+
+        for i, reason in sorted(reasons.items()):
+            data = questions_data[i]
+            failed_items.append({
+                "index": i,
+                "question_id": data.get("question_id", f"unknown_{i}") if isinstance(data, dict) else f"unknown_{i}",
+                "reason": reason
+            })
+        valid_indices = [i for i in valid_indices if i not in reasons]
+        documents = _BATCH_ADAPTER.validate_python([questions_data[i] for i in valid_indices])
+
+    # key一次性拼好（短字符串用+比f-string更快）
+    encoded_items = [
+        (
+            i, document.question_id, group_id + document.question_id,
+            document.category, document.updated_at,
+            _document_json(document)
+        )
+        for i, document in zip(valid_indices, documents)
+    ]
+
+    return encoded_items, failed_items
+
+
 async def _fallback_store_individual(questions_data: List[Dict], group_id: str):
     """批量操作失败时的回退方案：逐个存储"""
     logger.warning("批量操作失败，回退到逐个存储模式")
@@ -233,27 +464,80 @@ async def _fallback_store_individual(questions_data: List[Dict], group_id: str):
     return success_count, len(failed_items), failed_items
 
 
-async def store_hotspot_question(question_id: str, data: dict, group_id: str):
-    """存储单个热点问题"""
+async def store_hotspot_question(question_id: str, data: dict, group_id: str, nx: bool = False):
+    """
+    存储单个热点问题
+    :param nx: 只在问题不存在时写入，已存在时不覆盖并返回False
+    """
     key = f"{group_id}{question_id}"
 
     try:
-        required_keys = {"query_vector", "category", "question", "question_id"}
-        if not isinstance(data, dict) or not required_keys.issubset(data.keys()):
-            logger.warning(f"数据格式不符合要求: {question_id}")
+        # 与批量写入使用同一个文档模型校验和序列化，两条写入路径存储的文档结构一致
+        try:
+            document = HotspotQuestionDocument.model_validate(data)
+        except ValidationError as e:
+            logger.warning("数据格式不符合要求: %s, %s", question_id, e)
             return False
 
-        await client.json().set(key, '$', data)
-        logger.debug(f"✅ 存储问题: {question_id}")
+        result = (await _store_with_stats(
+            group_id,
+            [(key, _document_json(document), document.category)],
+            nx=nx,
+            last_updated=document.updated_at
+        ))[0]
+        if result == 0:
+            logger.warning("⚠️ 问题已存在，未覆盖: %s", question_id)
+            return False
+        if result != 1:
+            logger.error("❌ 存储失败 %s: %s", question_id, result)
+            return False
+        logger.debug("✅ 存储问题: %s", question_id)
         return True
 
     except Exception as e:
-        logger.error(f"❌ 存储失败 {question_id}: {e}")
+        logger.error("❌ 存储失败 %s: %s", question_id, e)
         return False
 
 
 # 搜索功能优化
 
+# 向量搜索命令中不随请求变化的部分只构建一次，每次调用只拼接动态参数
+_KNN_SEARCH_TAIL = (
+    'SORTBY', '__vector_score',
+    'RETURN', '8', 'question_id', 'question', 'standard_reply', 'category',
+    'related_links', 'created_at', 'updated_at', '__vector_score',
+    'DIALECT', '2'
+)
+_KNN_AGGREGATE_LOAD = (
+    'LOAD', '8', '@__key', '@question_id', '@question', '@standard_reply',
+    '@category', '@related_links', '@created_at', '@updated_at',
+    'APPLY', '1 - @__vector_score', 'AS', 'similarity_score',
+)
+
+
+@lru_cache(maxsize=256)
+def _knn_query(limit: int, category: str = None) -> str:
+    """构建KNN查询语句，可选按分类预过滤；组合有限，按参数缓存"""
+    if category:
+        return f"@category:{{{category}}}=>[KNN {limit} @vector $query_vector AS __vector_score]"
+    return f"*=>[KNN {limit} @vector $query_vector AS __vector_score]"
+
+
+@lru_cache(maxsize=256)
+def _knn_aggregate_tail(limit: int, min_similarity: float) -> tuple:
+    """带相似度阈值的FT.AGGREGATE中随参数变化的尾部"""
+    return _KNN_AGGREGATE_LOAD + (
+        'FILTER', f'@similarity_score >= {min_similarity}',
+        'SORTBY', '2', '@similarity_score', 'DESC', 'MAX', str(limit),
+        'DIALECT', '2'
+    )
+
+
+def _vector_params(query_vector, dtype=np.float32) -> tuple:
+    """KNN的PARAMS需要与索引类型一致的小端原始字节，类型相同时astype不复制，直接复用ndarray的缓冲区"""
+    return 'PARAMS', '2', 'query_vector', np.asarray(query_vector, dtype=np.float32).astype(dtype, copy=False).tobytes()
+
+
 async def vector_search_questions(
     group_id: str,
     query_vector: List[float],
@@ -270,140 +554,190 @@ async def vector_search_questions(
     :param min_similarity: 最小相似度阈值
     """
     try:
-        # 检查索引是否存在
-        if not await check_index_exists(group_id):
-            logger.warning(f"索引 {group_id} 不存在，尝试创建")
+        # 检查索引是否存在，查询向量按索引实际的元素类型编码(已有的FLOAT32索引不会因为配置改成FLOAT16而查不到)
+        dtype = await _get_index_dtype(group_id)
+        if dtype is None:
+            logger.warning("索引 %s 不存在，尝试创建", group_id)
             await create_hotspot_index(group_id)
+            dtype = await _get_index_dtype(group_id) or _VECTOR_DTYPE
 
-        # 构建向量字符串
-        vector_blob = ','.join(map(str, query_vector))
+        query = _knn_query(limit, category)
+        params = _vector_params(query_vector, dtype)
 
-        # 构建查询条件
-        if category:
-            query = f"@category:{{{category}}}=>[KNN {limit} @vector $query_vector AS __vector_score]"
-        else:
-            query = f"*=>[KNN {limit} @vector $query_vector AS __vector_score]"
-
-        logger.debug(f"执行向量搜索: group_id={group_id}, limit={limit}, category={category}")
-
-        result = await client.execute_command(
-            'FT.SEARCH', group_id, query,
-            'PARAMS', '2', 'query_vector', vector_blob,
-            'SORTBY', '__vector_score',
-            'RETURN', '8', 'question_id', 'question', 'standard_reply', 'category',
-            'related_links', 'created_at', 'updated_at', '__vector_score',
-            'DIALECT', '2'
-        )
+        logger.debug("执行向量搜索: group_id=%s, limit=%s, category=%s", group_id, limit, category)
 
-        parsed_results = parse_vector_search_result(result)
-
-        # 应用相似度过滤
         if min_similarity > 0:
-            filtered_results = [
-                r for r in parsed_results
-                if r.get('similarity_score', 0) >= min_similarity
-            ]
-            logger.debug(f"相似度过滤: {len(parsed_results)} -> {len(filtered_results)}")
-            parsed_results = filtered_results
-
-        logger.info(f"向量搜索完成: 返回 {len(parsed_results)} 个结果")
+            # 有相似度阈值时改用FT.AGGREGATE，低于阈值的行在redis里就被丢弃
+            result = await _search_batcher.submit(
+                ('FT.AGGREGATE', group_id, query) + params + _knn_aggregate_tail(limit, min_similarity)
+            )
+            parsed_results = parse_vector_aggregate_result(result)
+        else:
+            result = await _search_batcher.submit(
+                ('FT.SEARCH', group_id, query) + params + _KNN_SEARCH_TAIL
+            )
+            parsed_results = parse_vector_search_result(result)
+
+        logger.info("向量搜索完成: 返回 %s 个结果", len(parsed_results))
         return parsed_results
 
     except Exception as e:
-        logger.error(f"❌ 向量搜索失败: {e}")
+        logger.error("❌ 向量搜索失败: %s", e)
         return []
 
 
-# 缓存优化的统计功能
+# 增量维护的统计功能
+
+def _stats_keys(group_id: str) -> tuple:
+    return (
+        STATS_CATEGORIES_KEY.format(group_id=group_id),
+        STATS_TOTAL_KEY.format(group_id=group_id),
+        STATS_LAST_UPDATED_KEY.format(group_id=group_id),
+    )
+
 
-async def get_stats(group_id: str, use_cache: bool = True):
+async def _store_with_stats(group_id: str, items: List[tuple], nx: bool = False, last_updated: str = None) -> list:
+    """
+    写入文档并原子地更新分类计数
+    :param items: [(key, JSON字符串, 分类)]
+    :param nx: 只写入不存在的文档
+    :param last_updated: 本次写入的更新时间
+    :return: 与items等长的结果，1为已写入，0为NX模式下已存在，字符串为redis返回的错误
+    """
+    stats_keys = _stats_keys(group_id)
+    pipe = client.pipeline(transaction=False)
+    for start in range(0, len(items), STATS_SCRIPT_BATCH):
+        chunk = items[start:start + STATS_SCRIPT_BATCH]
+        args = ['1' if nx else '0', last_updated or '']
+        for _, payload, category in chunk:
+            args += (payload, str(category))
+        await _STORE_SCRIPT(keys=stats_keys + tuple(key for key, _, _ in chunk), args=args, client=pipe)
+
+    results = []
+    for chunk_results in await pipe.execute():
+        results.extend(chunk_results)
+    for key, _, _ in items:
+        _doc_cache.pop(key, None)
+    return results
+
+
+async def _delete_with_stats(group_id: str, keys: List[str]) -> int:
+    """删除文档并按实际删除的文档原子地扣减计数，返回实际删除的数量"""
+    stats_keys = _stats_keys(group_id)[:2]
+    pipe = client.pipeline(transaction=False)
+    for start in range(0, len(keys), STATS_SCRIPT_BATCH):
+        await _DELETE_SCRIPT(keys=stats_keys + tuple(keys[start:start + STATS_SCRIPT_BATCH]), client=pipe)
+    return sum(await pipe.execute())
+
+
+async def get_stats(group_id: str):
     """
-    获取统计信息 - 支持缓存
+    获取统计信息 - 直接读取增量维护的计数器
+    计数器还没有校准过（例如历史数据）时，用一次全量聚合初始化
     :param group_id: 分组ID
-    :param use_cache: 是否使用缓存
     """
-    cache_key = STATS_CACHE_KEY.format(group_id=group_id)
-
     try:
-        # 尝试从缓存获取
-        if use_cache:
-            cached_stats = await client.get(cache_key)
-            if cached_stats:
-                try:
-                    stats = json.loads(cached_stats)
-                    logger.debug(f"使用缓存的统计信息: {group_id}")
-                    return stats
-                except json.JSONDecodeError:
-                    logger.warning(f"缓存数据解析失败: {group_id}")
-
-        # 重新计算统计信息
-        stats = await _calculate_stats(group_id)
-
-        # 缓存结果
-        if use_cache and stats:
-            await client.setex(cache_key, CACHE_TTL, json.dumps(stats))
-            logger.debug(f"缓存统计信息: {group_id}")
-
-        return stats
+        pipe = client.pipeline(transaction=False)
+        pipe.exists(STATS_SEEDED_KEY.format(group_id=group_id))
+        pipe.hgetall(STATS_CATEGORIES_KEY.format(group_id=group_id))
+        pipe.get(STATS_TOTAL_KEY.format(group_id=group_id))
+        pipe.get(STATS_LAST_UPDATED_KEY.format(group_id=group_id))
+        seeded, categories, total, last_updated = await pipe.execute()
+
+        if not seeded:
+            return await _seed_stats(group_id)
+
+        return {
+            "total_questions": int(total or 0),
+            "categories": {k: int(v) for k, v in categories.items() if int(v) > 0},
+            "index_status": "active" if await check_index_exists(group_id) else "not_found",
+            "last_updated": last_updated
+        }
 
     except Exception as e:
-        logger.error(f"❌ 获取统计信息失败: {e}")
+        logger.error("❌ 获取统计信息失败: %s", e)
         return {"error": str(e)}
 
 
+async def _seed_stats(group_id: str):
+    """
+    用全量聚合的结果校准计数器
+    聚合期间计数器被其他写入修改时(WATCH失败)放弃本次校准，避免覆盖掉这期间的增量
+    """
+    categories_key, total_key, last_updated_key = _stats_keys(group_id)
+    async with client.pipeline() as pipe:
+        await pipe.watch(categories_key, total_key, last_updated_key)
+        stats = await _calculate_stats(group_id)
+        if "error" in stats or stats["index_status"] != "active":
+            return stats
+
+        pipe.multi()
+        pipe.delete(categories_key)
+        if stats["categories"]:
+            pipe.hset(categories_key, mapping=stats["categories"])
+        pipe.set(total_key, stats["total_questions"])
+        if stats["last_updated"]:
+            pipe.set(last_updated_key, stats["last_updated"])
+        pipe.set(STATS_SEEDED_KEY.format(group_id=group_id), 1, ex=STATS_SEED_TTL)
+        try:
+            await pipe.execute()
+        except redis.WatchError:
+            logger.info("统计校准期间有新的写入，下次读取时再校准: %s", group_id)
+            return stats
+
+    logger.info("统计计数器已校准: %s", group_id)
+    return stats
+
+
 async def _calculate_stats(group_id: str):
-    """计算统计信息"""
+    """
+    计算统计信息
+    分类直方图和最新更新时间都交给RediSearch在服务端聚合，不再逐个key读取JSON
+    """
     try:
         # 检查索引状态
-        try:
-            index_info = await client.execute_command('FT.INFO', group_id)
-            index_status = "active"
-        except:
-            index_status = "not_found"
-
-        # 获取所有问题的key
-        keys = await client.keys(f"{group_id}*")
+        index_status = "active" if await check_index_exists(group_id) else "not_found"
 
-        # 统计分类和其他信息
         categories = {}
-        total_size = 0
         latest_update = None
+        total_questions = 0
 
-        # 使用pipeline批量获取数据
-        if keys:
-            pipe = client.pipeline()
-            for key in keys:
-                pipe.json().get(key, '$.category', '$.updated_at')
+        if index_status == "active":
+            total_questions = await count_questions(group_id)
 
-            results = await pipe.execute()
-
-            for result in results:
-                if result:
-                    try:
-                        category = result.get('$.category', ['未分类'])[0] if result.get('$.category') else '未分类'
-                        categories[category] = categories.get(category, 0) + 1
-
-                        # 跟踪最新更新时间
-                        updated_at = result.get('$.updated_at', [None])[0] if result.get('$.updated_at') else None
-                        if updated_at and (not latest_update or updated_at > latest_update):
-                            latest_update = updated_at
-
-                    except (KeyError, IndexError, TypeError):
-                        categories['未分类'] = categories.get('未分类', 0) + 1
+            # 一次聚合得到各分类的问题数量
+            category_result = await client.execute_command(
+                'FT.AGGREGATE', group_id, '*',
+                'GROUPBY', '1', '@category',
+                'REDUCE', 'COUNT', '0', 'AS', 'cnt'
+            )
+            for row in parse_aggregate_result(category_result):
+                category = row.get('category') or '未分类'
+                categories[category] = categories.get(category, 0) + int(row.get('cnt', 0))
+
+            # updated_at是ISO格式字符串，MAX只作用于数值，这里按字符串倒序取第一条
+            latest_result = await client.execute_command(
+                'FT.AGGREGATE', group_id, '*',
+                'LOAD', '1', '@updated_at',
+                'SORTBY', '2', '@updated_at', 'DESC',
+                'MAX', '1'
+            )
+            latest_rows = parse_aggregate_result(latest_result)
+            if latest_rows:
+                latest_update = latest_rows[0].get('updated_at')
 
         stats = {
-            "total_questions": len(keys),
+            "total_questions": total_questions,
             "categories": categories,
             "index_status": index_status,
-            "last_updated": latest_update,
-            "cache_time": datetime.now().isoformat()
+            "last_updated": latest_update
         }
 
-        logger.debug(f"计算统计信息完成: {group_id}")
+        logger.debug("计算统计信息完成: %s", group_id)
         return stats
 
     except Exception as e:
-        logger.error(f"计算统计信息失败: {e}")
+        logger.error("计算统计信息失败: %s", e)
         return {"error": str(e)}
 
 
@@ -412,115 +746,143 @@ async def _calculate_stats(group_id: str):
 async def cleanup_expired_cache():
     """清理过期的缓存"""
     try:
-        # 获取所有缓存键
-        cache_keys = await client.keys("hotspot:*")
         cleaned = 0
 
-        for key in cache_keys:
+        # 用SCAN增量遍历缓存键，避免KEYS阻塞redis
+        async for key in client.scan_iter(match="hotspot:*", count=1000):
             ttl = await client.ttl(key)
             if ttl == -1:  # 没有过期时间设置
                 await client.expire(key, CACHE_TTL)
                 cleaned += 1
 
-        logger.info(f"缓存清理完成: 处理了 {cleaned} 个键")
+        logger.info("缓存清理完成: 处理了 %s 个键", cleaned)
         return cleaned
 
     except Exception as e:
-        logger.error(f"缓存清理失败: {e}")
+        logger.error("缓存清理失败: %s", e)
         return 0
 
 
-async def get_hotspot_question(group_id: str, question_id: str):
-    """获取热点问题"""
+async def get_hotspot_question(group_id: str, question_id: str, use_cache: bool = True):
+    """
+    获取热点问题，优先读取进程内缓存
+    :param use_cache: 为False时直接读redis，用于读-改-写和查重这类不能用其他worker未失效的旧数据的场景
+    """
     key = f"{group_id}{question_id}"
+    cached = _doc_cache.get(key) if use_cache else None
+    if cached is not None:
+        return cached
+
     try:
         result = await client.json().get(key)
         if result:
-            logger.debug(f"✅ 获取问题: {question_id}")
+            _doc_cache[key] = result
+            logger.debug("✅ 获取问题: %s", question_id)
         else:
-            logger.debug(f"⚠️ 问题不存在: {question_id}")
+            logger.debug("⚠️ 问题不存在: %s", question_id)
         return result
     except Exception as e:
-        logger.error(f"❌ 获取失败: {e}")
+        logger.error("❌ 获取失败: %s", e)
         return None
 
 
-async def list_all_questions(group_id: str = None, limit: int = 10, offset: int = 0):
-    """获取问题列表 - 支持分页"""
+async def list_all_questions(group_id: str = None, limit: int = 10, cursor_id: int = None,
+                             with_cursor: bool = False):
+    """
+    获取问题列表 - 基于游标分页
+    每一页只读取limit条，翻页成本不随页码增长
+    RediSearch每个索引的游标数量有上限，只有调用方要翻页(with_cursor)时才在首页打开游标，
+    并设置较短的MAXIDLE，读到最后一页或空闲超时后redis自动释放
+    :param group_id: 分组ID
+    :param limit: 每页数量
+    :param cursor_id: 上一页返回的游标，首页不传
+    :param with_cursor: 首页是否打开游标用于后续翻页
+    :return: (问题列表, 下一页的游标，没有更多数据或没有打开游标时为None)
+    """
     try:
         if not group_id:
-            return []
-
-        query = "*"
+            return [], None
 
-        result = await client.execute_command(
-            'FT.SEARCH', group_id, query,
-            'LIMIT', str(offset), str(limit),
-            'RETURN', '7', 'question', 'standard_reply', 'category',
-            'question_id', 'related_links', 'created_at', 'updated_at'
-        )
+        if cursor_id:
+            result = await client.execute_command(
+                'FT.CURSOR', 'READ', group_id, str(cursor_id),
+                'COUNT', str(limit)
+            )
+        elif with_cursor:
+            result = await client.execute_command(
+                'FT.AGGREGATE', group_id, '*', *_LIST_LOAD,
+                'WITHCURSOR', 'COUNT', str(limit), 'MAXIDLE', str(LIST_CURSOR_MAX_IDLE_MS)
+            )
+        else:
+            result = await client.execute_command(
+                'FT.AGGREGATE', group_id, '*', *_LIST_LOAD,
+                'LIMIT', '0', str(limit)
+            )
+            parsed_results = parse_aggregate_result(result)
+            logger.debug("获取问题列表: %s 个问题", len(parsed_results))
+            return parsed_results, None
 
-        parsed_results = parse_search_result(result)
-        logger.debug(f"获取问题列表: {len(parsed_results)} 个问题")
-        return parsed_results
+        rows, next_cursor = result
+        parsed_results = parse_aggregate_result(rows)
+        logger.debug("获取问题列表: %s 个问题", len(parsed_results))
+        return parsed_results, (int(next_cursor) or None)
 
     except Exception as e:
-        logger.error(f"❌ 获取问题列表失败: {e}")
-        return []
+        logger.error("❌ 获取问题列表失败: %s", e)
+        return [], None
 
 
 async def delete_hotspot_question(group_id: str, question_id: str):
     """删除热点问题"""
     key = f"{group_id}{question_id}"
+    _doc_cache.pop(key, None)
     try:
-        result = await client.delete(key)
+        # 删除和计数扣减原子完成，只有确实删掉了文档才减计数，并发删除同一个问题时不会重复扣减
+        result = await _delete_with_stats(group_id, [key])
         if result > 0:
-            # 清除相关缓存
-            cache_key = STATS_CACHE_KEY.format(group_id=group_id)
-            await client.delete(cache_key)
-            logger.info(f"✅ 删除问题: {question_id}")
+            logger.info("✅ 删除问题: %s", question_id)
         else:
-            logger.warning(f"⚠️ 问题不存在: {question_id}")
+            logger.warning("⚠️ 问题不存在: %s", question_id)
         return result > 0
     except Exception as e:
-        logger.error(f"❌ 删除失败: {e}")
+        logger.error("❌ 删除失败: %s", e)
         return False
 
 
 async def delete_questions_by_category(group_id: str, category: str):
-    """按分类删除问题"""
+    """
+    按分类删除问题
+    NOCONTENT只取key，每一页用一次UNLINK删除，内存在redis后台线程中释放
+    """
     try:
-        result = await client.execute_command(
-            'FT.SEARCH', group_id, f"@category:{{{category}}}",
-            'RETURN', '0'
-        )
-
-        if len(result) < 2:
-            logger.info(f"分类 {category} 下没有问题需要删除")
-            return 0
+        count = 0
 
-        # 使用pipeline批量删除
-        pipe = client.pipeline()
-        keys_to_delete = []
-
-        for i in range(1, len(result), 2):
-            key = result[i]
-            keys_to_delete.append(key)
-            pipe.delete(key)
+        while True:
+            # 已删除的文档会同步移出索引，所以每次都从第0条开始取
+            result = await client.execute_command(
+                'FT.SEARCH', group_id, f"@category:{{{category}}}",
+                'NOCONTENT', 'LIMIT', '0', str(DELETE_BATCH_SIZE)
+            )
+            keys_to_delete = result[1:] if result else []
+            if not keys_to_delete:
+                break
 
-        if keys_to_delete:
-            results = await pipe.execute()
-            count = sum(1 for r in results if r)
+            # 计数按实际删除的文档和它们当前的分类扣减，并发删除时已经被其他请求删掉的key不会重复扣减
+            deleted = await _delete_with_stats(group_id, keys_to_delete)
 
-            # 清除缓存
-            cache_key = STATS_CACHE_KEY.format(group_id=group_id)
-            await client.delete(cache_key)
+            for key in keys_to_delete:
+                _doc_cache.pop(key, None)
+            count += deleted
+            if not deleted or len(keys_to_delete) < DELETE_BATCH_SIZE:
+                break
 
-            logger.info(f"✅ 删除分类 {category}: {count} 个问题")
-            return count
+        if count == 0:
+            logger.info("分类 %s 下没有问题需要删除", category)
+            return 0
 
-        return 0
+        logger.info("✅ 删除分类 %s: %s 个问题", category, count)
+        return count
 
     except Exception as e:
-        logger.error(f"❌ 按分类删除失败: {e}")
+        logger.error("❌ 按分类删除失败: %s", e)
         return 0
\ No newline at end of file
@@ -9,13 +9,20 @@ class RedisClient:
 
     def __init__(self):
         self.cfg = my_config.get_redis_config()
-        self.client = redis.Redis(
+        # 有上限的阻塞连接池：并发高峰时排队等待空闲连接，而不是无限制地新建socket
+        self.pool = redis.BlockingConnectionPool(
             host=self.cfg.get('host'),
             port=self.cfg.get('port'),
             db=self.cfg.get('db'),
             password=self.cfg.get('password'),
-            decode_responses=True
+            max_connections=self.cfg.get('max_connections', 64),
+            timeout=self.cfg.get('pool_timeout', 5),
+            decode_responses=True,
+            # 安装了hiredis时redis-py会自动使用C实现的RESP解析器
+            socket_keepalive=True,
+            health_check_interval=self.cfg.get('health_check_interval', 30)
         )
+        self.client = redis.Redis(connection_pool=self.pool)
         # 注释掉同步ping，改为在应用启动时异步ping
         # self.ping() # 如果ping出错，则证明初始化失败
 
@@ -27,9 +34,18 @@ class RedisClient:
         """获取已经初始化的client"""
         return self.client
 
+    def pool_stats(self) -> dict:
+        """连接池的使用情况"""
+        return {
+            "max_connections": self.pool.max_connections,
+            "in_use": len(self.pool._in_use_connections),
+            "idle": len(self.pool._available_connections),
+        }
+
     async def close(self):
         """关闭连接"""
         await self.client.close()
+        await self.pool.disconnect()
 
 
-redis_client = RedisClient()
\ No newline at end of file
+redis_client = RedisClient()
@@ -2,12 +2,20 @@
 热点问题处理器 - 业务逻辑实现
 """
 import json
+import time
 import uuid
-import requests
-from datetime import datetime
-from typing import List, Optional, Dict
+import asyncio
+import bisect
+import httpx
+import numpy as np
+import orjson
+import xxhash
+from functools import lru_cache
+from cachetools import TTLCache
+from typing import Any, List, Optional, Dict
 
 from src.utils.logger import logger
+from src.utils.batcher import MicroBatcher
 from src.dbs.redis_stack import curd
 from src.router.hotspot.models import (
     QuestionInfo, AddQuestionRequest, AddQuestionBatchRequest,
@@ -16,23 +24,122 @@ from src.router.hotspot.models import (
 from src.service.config import my_config
 
 
+def _response_dict(code: int, status: str, message: str, data=None) -> dict:
+    """热点接口直接返回的响应体，字段与ApiResponse一致，但不经过pydantic模型"""
+    return {"code": code, "status": status, "message": message, "data": data}
+
+
+def _batch_query_entry(index: int, query: str, search_results) -> dict:
+    """批量查询中单个查询的结果条目，search_results为异常时记录错误信息"""
+    if isinstance(search_results, Exception):
+        logger.error("查询 '%s' 失败: %s", query, search_results)
+        return {
+            "query": query,
+            "query_index": index,
+            "results": [],
+            "total": 0,
+            "error": str(search_results)
+        }
+
+    return {
+        "query": query,
+        "query_index": index,
+        "results": search_results,
+        "total": len(search_results)
+    }
+
+
+def _now_iso() -> str:
+    """当前UTC时间的ISO-8601字符串(秒级)，直接格式化time.gmtime，不构造datetime对象"""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
 class EmbeddingService:
     """向量化服务 (使用本地vLLM部署的bge-m3模型)"""
 
-    def __init__(self, config: Dict[str, str] = None):
-        # 新的配置：本地vLLM服务的地址和模型ID
-        self.base_url = "http://127.0.0.1:8100/v1"  # vLLM OpenAI兼容接口的默认地址
-        self.model_id = "BAAI/bge-m3"  # 您通过 "show available models" 看到的模型ID
+    def __init__(self, config: Dict[str, Any] = None):
+        # 地址、模型ID和维度都来自模型配置，默认使用本地vLLM服务
+        config = config or my_config.get_model_config()["embedding"]
+        self.base_url = config["base_url"]
+        self.model_id = config["model"]
+        self.dim = config.get("n_dim", 1024)
+        # 空文本和调用失败时共用的只读零向量，批量场景用broadcast_to得到零拷贝的视图
+        self.zero_vector = np.zeros(self.dim, dtype=np.float32)
+        self.zero_vector.flags.writeable = False
         self.headers = {
             # 本地服务通常不需要API Key，所以认证头可以移除或简化
             "Content-Type": "application/json"
         }
-        logger.info(f"EmbeddingService已切换至本地vLLM服务，模型: {self.model_id}")
+        # 共享的keep-alive连接池，在应用启动时创建
+        self._client: Optional[httpx.AsyncClient] = None
+        # 单条文本的请求在5ms窗口内合并成一次批量调用，充分利用vLLM的批处理能力
+        self._batcher = MicroBatcher(self.aget_embeddings_batch, max_batch_size=64, max_wait=0.005)
+        # vLLM会把一批内的序列补齐到最长的那条，长短文本分桶后分别请求
+        self.length_bins = config.get("length_bins", [64, 256, 1024])
+        # 热点问题的查询大量重复，单条文本的向量按文本哈希缓存；进行中的请求共享同一个Task
+        self._embedding_cache = TTLCache(maxsize=50_000, ttl=3600)
+        self._inflight: Dict[int, asyncio.Task] = {}
+        logger.info("EmbeddingService已切换至本地vLLM服务，模型: %s, 维度: %s", self.model_id, self.dim)
+
+    async def start(self):
+        """
+        创建复用连接的HTTP客户端，必须在事件循环中调用。
+        https地址通过ALPN协商HTTP/2，并发请求复用同一条连接；明文http只能走HTTP/1.1，靠连接池并发
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                base_url=self.base_url,
+                headers=self.headers,
+                timeout=httpx.Timeout(60.0, connect=2.0),  # 批量处理，超时时间可以适当延长
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=32, keepalive_expiry=75)
+            )
 
-    def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    async def close(self):
+        """关闭HTTP客户端"""
+        for task in list(self._inflight.values()):
+            task.cancel()
+        await self._batcher.close()
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """获取单条文本的向量，优先读缓存，未命中时与同一时间窗口内的其他请求合并发送"""
+        text_hash = xxhash.xxh3_64_intdigest(text.strip())
+        cached = self._embedding_cache.get(text_hash)
+        if cached is not None:
+            return cached
+
+        task = self._inflight.get(text_hash)
+        if task is None:
+            # 请求在独立的Task里执行，不属于任何一个调用方：先到的调用方被取消时，
+            # 等待同一文本的其他请求不受影响，结果照常写入缓存
+            task = asyncio.get_running_loop().create_task(self._fetch_embedding(text_hash, text))
+            self._inflight[text_hash] = task
+            task.add_done_callback(lambda t: self._on_fetch_done(text_hash, t))
+        return await asyncio.shield(task)
+
+    async def _fetch_embedding(self, text_hash: int, text: str) -> np.ndarray:
+        embedding = await self._batcher.submit(text)
+        # 调用失败时返回的是零向量，不缓存
+        if embedding.any():
+            # 缓存的向量会被多个请求共用，设为只读
+            embedding.flags.writeable = False
+            self._embedding_cache[text_hash] = embedding
+        return embedding
+
+    def _on_fetch_done(self, text_hash: int, task: asyncio.Task):
+        self._inflight.pop(text_hash, None)
+        # 等待方都已取消时避免"exception was never retrieved"警告
+        if not task.cancelled():
+            task.exception()
+
+    async def aget_embeddings_batch(self, texts: List[str]) -> np.ndarray:
         """
         批量获取向量表示。
-        vLLM的embedding接口本身就支持批量处理，效率更高。
+        vLLM的embedding接口本身就支持批量处理，效率更高；请求期间事件循环可以处理其他请求。
+        :return: 形状为(len(texts), dim)的float32矩阵，按行与texts一一对应
         """
         # 过滤掉空字符串，避免不必要的API调用
         # 并记录原始索引，以便将结果正确地放回
@@ -41,47 +148,57 @@ class EmbeddingService:
 
         if not texts_to_embed:
             logger.warning("所有文本均为空，返回零向量列表")
-            return [[0.0] * 1024 for _ in range(len(texts))]  # bge-m3的维度是1024
+            return self._zero_vectors(len(texts))
 
-        url = f"{self.base_url}/embeddings"
-        # 使用与OpenAI完全兼容的请求体
-        payload = {
-            "model": self.model_id,
-            "input": texts_to_embed
-        }
+        # 按长度分桶，每个桶内记录的是texts_to_embed中的下标
+        buckets: Dict[int, List[int]] = {}
+        for i, text in enumerate(texts_to_embed):
+            buckets.setdefault(bisect.bisect_left(self.length_bins, len(text)), []).append(i)
+        bins = [buckets[b] for b in sorted(buckets)]
 
         try:
-            response = requests.post(url, headers=self.headers, json=payload, timeout=60)  # 批量处理，超时时间可以适当延长
-            response.raise_for_status()
-            result = response.json()
-
-            # 创建一个正确大小的零向量列表
-            final_embeddings = [[0.0] * 1024 for _ in range(len(texts))]
+            await self.start()
+            # 各个桶并发请求
+            results = await asyncio.gather(
+                *(self._post_embeddings([texts_to_embed[i] for i in bin_indices]) for bin_indices in bins),
+                return_exceptions=True
+            )
+        except Exception as e:
+            logger.error("调用本地vLLM向量化失败: %s", e)
+            # 如果请求失败，则所有文本都返回零向量
+            return self._zero_vectors(len(texts))
 
-            # 将获取到的向量根据原始索引放回正确的位置
-            for i, data in enumerate(result["data"]):
-                original_index = original_indices[i]
-                final_embeddings[original_index] = data["embedding"]
+        # 创建一个正确大小的零矩阵
+        final_embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
 
-            logger.info(f"成功从本地vLLM获取 {len(texts_to_embed)} 个向量")
-            return final_embeddings
+        # 将获取到的向量根据原始索引放回正确的位置，失败的桶保留零向量
+        success_count = 0
+        for bin_indices, result in zip(bins, results):
+            if isinstance(result, Exception):
+                logger.error("调用本地vLLM向量化失败(%s条): %s", len(bin_indices), result)
+                continue
+            final_embeddings[[original_indices[i] for i in bin_indices]] = result
+            success_count += len(bin_indices)
 
-        except Exception as e:
-            logger.error(f"调用本地vLLM向量化失败: {e}")
-            # 如果请求失败，则所有文本都返回零向量
-            return [[0.0] * 1024 for _ in range(len(texts))]
+        logger.info("成功从本地vLLM获取 %s 个向量，分 %s 个长度桶请求", success_count, len(bins))
+        return final_embeddings
 
-    def get_embedding(self, text: str) -> List[float]:
-        """
-        获取单个文本的向量表示（兼容性方法）
-        内部调用批量接口
-        """
-        if not (text and text.strip()):
-            logger.warning("输入文本为空，返回零向量")
-            return [0.0] * 1024
+    def _zero_vectors(self, count: int) -> np.ndarray:
+        """count行零向量，所有行共享同一块内存(只读)"""
+        return np.broadcast_to(self.zero_vector, (count, self.dim))
 
-        batch_result = self.get_embeddings_batch([text])
-        return batch_result[0]
+    async def _post_embeddings(self, texts: List[str]) -> np.ndarray:
+        """向vLLM发送一次批量向量化请求"""
+        # 使用与OpenAI完全兼容的请求体
+        payload = {
+            "model": self.model_id,
+            "input": texts
+        }
+        # 请求和响应都用orjson编解码，响应中成批的浮点数解析开销最大
+        response = await self._client.post("/embeddings", content=orjson.dumps(payload))
+        response.raise_for_status()
+        result = orjson.loads(response.content)
+        return np.array([data["embedding"] for data in result["data"]], dtype=np.float32)
 
 
 class HotspotHandler:
@@ -89,21 +206,28 @@ class HotspotHandler:
 
     def __init__(self):
         self.model_config = my_config.get_model_config()
-        self.embedding_service = EmbeddingService()
+        self.embedding_service = EmbeddingService(self.model_config["embedding"])
+        self.min_similarity = self.model_config["embedding"].get("min_similarity", 0.5)
+        # 限制同时发往Redis的向量搜索数量
+        self._search_semaphore = asyncio.Semaphore(16)
 
-    async def _get_text_embedding(self, text: str) -> List[float]:
+    async def _get_text_embedding(self, text: str) -> np.ndarray:
         """
         获取文本的向量嵌入
         """
+        if not (text and text.strip()):
+            logger.warning("输入文本为空，返回零向量")
+            return self.embedding_service.zero_vector
+
         try:
             # 调用本地vLLM embedding服务
-            embedding = self.embedding_service.get_embedding(text)
-            logger.debug(f"成功获取文本向量，维度: {len(embedding)}")
+            embedding = await self.embedding_service.embed(text)
+            logger.debug("成功获取文本向量，维度: %s", len(embedding))
             return embedding
         except Exception as e:
-            logger.error(f"获取文本向量失败: {str(e)}")
+            logger.error("获取文本向量失败: %s", e)
             # 返回零向量作为fallback
-            return [0.0] * 1024
+            return self.embedding_service.zero_vector
 
     async def add_question(self, request: AddQuestionRequest) -> ApiResponse:
         """添加单个热点问题"""
@@ -111,10 +235,12 @@ class HotspotHandler:
             # 1. 检查索引是否存在，不存在则创建
             index_created = await curd.create_hotspot_index(request.group_id)
             if not index_created:
-                logger.warning(f"索引创建可能失败，但继续执行: {request.group_id}")
+                logger.warning("索引创建可能失败，但继续执行: %s", request.group_id)
 
-            # 2. 检查问题ID是否已存在
-            existing = await curd.get_hotspot_question(request.group_id, request.question_info.question_id)
+            # 2. 检查问题ID是否已存在，直接读redis，其他worker刚删除的问题不会被进程内缓存误判为已存在
+            existing = await curd.get_hotspot_question(
+                request.group_id, request.question_info.question_id, use_cache=False
+            )
             if existing:
                 return ApiResponse(
                     code=400,
@@ -126,7 +252,7 @@ class HotspotHandler:
             question_vector = await self._get_text_embedding(request.question_info.question)
 
             # 4. 构建存储数据
-            current_time = datetime.now().isoformat()
+            current_time = _now_iso()
             store_data = {
                 "question_id": request.question_info.question_id,
                 "question": request.question_info.question,
@@ -138,15 +264,16 @@ class HotspotHandler:
                 "updated_at": current_time
             }
 
-            # 5. 存储到Redis
+            # 5. 存储到Redis，NX写入：查重之后其他请求并发添加了同一个ID时不会被覆盖
             success = await curd.store_hotspot_question(
                 question_id=request.question_info.question_id,
                 data=store_data,
-                group_id=request.group_id
+                group_id=request.group_id,
+                nx=True
             )
 
             if success:
-                logger.info(f"成功添加热点问题: {request.question_info.question_id}")
+                logger.info("成功添加热点问题: %s", request.question_info.question_id)
                 return ApiResponse(
                     code=200,
                     status="success",
@@ -161,7 +288,7 @@ class HotspotHandler:
                 )
 
         except Exception as e:
-            logger.error(f"添加问题失败: {str(e)}")
+            logger.error("添加问题失败: %s", e)
             return ApiResponse(
                 code=500,
                 status="error",
@@ -174,67 +301,34 @@ class HotspotHandler:
             # 1. 确保索引存在
             await curd.create_hotspot_index(request.group_id)
 
-            # 2. 检查是否有重复的问题ID
-            existing_questions = []
-            for question_info in request.question_info_list:
-                existing = await curd.get_hotspot_question(request.group_id, question_info.question_id)
-                if existing:
-                    existing_questions.append(question_info.question_id)
-
-            if existing_questions:
-                return ApiResponse(
-                    code=400,
-                    status="error",
-                    message=f"以下问题ID已存在: {', '.join(existing_questions)}"
-                )
-
-            # 3. 批量生成向量 - 关键优化点！
-            logger.info(f"开始批量向量化 {len(request.question_info_list)} 个问题")
+            # 2. 批量生成向量 - 关键优化点！
+            logger.info("开始批量向量化 %s 个问题", len(request.question_info_list))
             question_texts = [q.question for q in request.question_info_list]
-            question_vectors = self.embedding_service.get_embeddings_batch(question_texts)
-            logger.info(f"批量向量化完成，获得 {len(question_vectors)} 个向量")
-
-            # 4. 批量存储
-            success_count = 0
-            failed_items = []
-            current_time = datetime.now().isoformat()
-
-            for i, question_info in enumerate(request.question_info_list):
-                try:
-                    # 构建存储数据
-                    store_data = {
-                        "question_id": question_info.question_id,
-                        "question": question_info.question,
-                        "standard_reply": question_info.standard_reply,
-                        "related_links": question_info.related_links or [],
-                        "category": question_info.category,
-                        "query_vector": question_vectors[i],  # 使用批量获取的向量
-                        "created_at": current_time,
-                        "updated_at": current_time
-                    }
-
-                    # 存储到Redis
-                    success = await curd.store_hotspot_question(
-                        question_id=question_info.question_id,
-                        data=store_data,
-                        group_id=request.group_id
-                    )
-
-                    if success:
-                        success_count += 1
-                    else:
-                        failed_items.append({
-                            "question_id": question_info.question_id,
-                            "reason": "存储失败"
-                        })
-
-                except Exception as e:
-                    failed_items.append({
-                        "question_id": question_info.question_id,
-                        "reason": str(e)
-                    })
+            question_vectors = await self.embedding_service.aget_embeddings_batch(question_texts)
+            logger.info("批量向量化完成，获得 %s 个向量", len(question_vectors))
+
+            # 3. 批量存储，一个pipeline写完；已存在的问题ID不覆盖，记入failed_items
+            current_time = _now_iso()
+            # 文档模型要求向量是list，整个矩阵一次性转换
+            question_vector_lists = question_vectors.tolist()
+            store_data_list = [
+                {
+                    "question_id": question_info.question_id,
+                    "question": question_info.question,
+                    "standard_reply": question_info.standard_reply,
+                    "related_links": question_info.related_links or [],
+                    "category": question_info.category,
+                    "query_vector": question_vector_lists[i],  # 使用批量获取的向量
+                    "created_at": current_time,
+                    "updated_at": current_time
+                }
+                for i, question_info in enumerate(request.question_info_list)
+            ]
+            success_count, _, failed_items = await curd.store_hotspot_questions_batch(
+                store_data_list, request.group_id, nx=True
+            )
 
-            logger.info(f"批量添加完成: 成功{success_count}个, 失败{len(failed_items)}个")
+            logger.info("批量添加完成: 成功%s个, 失败%s个", success_count, len(failed_items))
 
             return ApiResponse(
                 code=200,
@@ -249,7 +343,7 @@ class HotspotHandler:
             )
 
         except Exception as e:
-            logger.error(f"批量添加问题失败: {str(e)}")
+            logger.error("批量添加问题失败: %s", e)
             return ApiResponse(
                 code=500,
                 status="error",
@@ -259,8 +353,8 @@ class HotspotHandler:
     async def update_question(self, request: UpdateQuestionRequest) -> ApiResponse:
         """更新热点问题"""
         try:
-            # 1. 获取现有数据
-            existing_data = await curd.get_hotspot_question("default", request.question_id)
+            # 1. 获取现有数据，读-改-写必须基于redis中的最新版本，不能用可能过期的进程内缓存
+            existing_data = await curd.get_hotspot_question("default", request.question_id, use_cache=False)
             if not existing_data:
                 return ApiResponse(
                     code=404,
@@ -285,7 +379,7 @@ class HotspotHandler:
             if request.category is not None:
                 updated_data["category"] = request.category
 
-            updated_data["updated_at"] = "2025-01-01"  # DO: 使用实际时间
+            updated_data["updated_at"] = _now_iso()
 
             # 3. 存储更新后的数据
             success = await curd.store_hotspot_question(
@@ -295,7 +389,7 @@ class HotspotHandler:
             )
 
             if success:
-                logger.info(f"成功更新问题: {request.question_id}")
+                logger.info("成功更新问题: %s", request.question_id)
                 return ApiResponse(
                     code=200,
                     status="success",
@@ -310,69 +404,58 @@ class HotspotHandler:
                 )
 
         except Exception as e:
-            logger.error(f"更新问题失败: {str(e)}")
+            logger.error("更新问题失败: %s", e)
             return ApiResponse(
                 code=500,
                 status="error",
                 message=f"更新问题失败: {str(e)}"
             )
 
-    async def query_questions_batch(self, queries: List[str], group_id: str, limit: int = 3) -> ApiResponse:
+    async def query_questions_batch(
+        self, queries: List[str], group_id: str, limit: int = 3, category: Optional[str] = None
+    ) -> dict:
         """批量查询热点问题 - 使用batch embedding提高效率"""
         try:
             if not queries:
-                return ApiResponse(
+                return _response_dict(
                     code=400,
                     status="error",
                     message="查询列表不能为空"
                 )
 
-            logger.info(f"开始批量查询: {len(queries)} 个问题")
+            logger.info("开始批量查询: %s 个问题", len(queries))
 
             # 1. 批量生成查询向量
-            query_vectors = self.embedding_service.get_embeddings_batch(queries)
-            logger.info(f"批量向量化完成，获得 {len(query_vectors)} 个查询向量")
+            query_vectors = await self.embedding_service.aget_embeddings_batch(queries)
+            logger.info("批量向量化完成，获得 %s 个查询向量", len(query_vectors))
 
-            # 2. 为每个查询执行向量搜索
-            all_results = []
-            min_similarity = 0.5  # 最低相似度阈值
+            # 2. 所有查询的向量搜索并发执行，相似度阈值在redis中过滤
+            min_similarity = self.min_similarity
 
-            for i, (query, query_vector) in enumerate(zip(queries, query_vectors)):
-                try:
-                    # 执行向量搜索
-                    search_results = await curd.vector_search_questions(
+            async def _search(query_vector):
+                async with self._search_semaphore:
+                    return await curd.vector_search_questions(
                         group_id=group_id,
                         query_vector=query_vector,
-                        limit=limit
+                        limit=limit,
+                        category=category,
+                        min_similarity=min_similarity
                     )
 
-                    # 过滤低相似度结果
-                    filtered_results = [
-                        result for result in search_results
-                        if result.get('similarity_score', 0) >= min_similarity
-                    ]
-
-                    all_results.append({
-                        "query": query,
-                        "query_index": i,
-                        "results": filtered_results,
-                        "total": len(filtered_results),
-                        "original_count": len(search_results)
-                    })
-
-                except Exception as e:
-                    logger.error(f"查询 '{query}' 失败: {str(e)}")
-                    all_results.append({
-                        "query": query,
-                        "query_index": i,
-                        "results": [],
-                        "total": 0,
-                        "error": str(e)
-                    })
-
-            logger.info(f"批量查询完成: {len(queries)} 个查询已处理")
+            search_results_list = await asyncio.gather(
+                *(_search(query_vector) for query_vector in query_vectors),
+                return_exceptions=True
+            )
+
+            # gather的结果与queries顺序一致，按下标一次性生成
+            all_results = [
+                _batch_query_entry(i, query, search_results)
+                for i, (query, search_results) in enumerate(zip(queries, search_results_list))
+            ]
 
-            return ApiResponse(
+            logger.info("批量查询完成: %s 个查询已处理", len(queries))
+
+            return _response_dict(
                 code=200,
                 status="success",
                 message="批量查询成功",
@@ -381,64 +464,57 @@ class HotspotHandler:
                     "total_queries": len(queries),
                     "search_params": {
                         "min_similarity": min_similarity,
-                        "limit_per_query": limit
+                        "limit_per_query": limit,
+                        "category": category
                     }
                 }
             )
 
         except Exception as e:
-            logger.error(f"批量查询失败: {str(e)}")
-            return ApiResponse(
+            logger.error("批量查询失败: %s", e)
+            return _response_dict(
                 code=500,
                 status="error",
                 message=f"批量查询失败: {str(e)}"
             )
 
-    async def query_questions(self, request: QueryRequest) -> ApiResponse:
+    async def query_questions(self, request: QueryRequest) -> dict:
         """查询热点问题 - 使用向量相似度搜索"""
         try:
             # 1. 将查询文本转换为向量
-            logger.info(f"开始处理查询: {request.query}")
+            logger.info("开始处理查询: %s", request.query)
             query_vector = await self._get_text_embedding(request.query)
 
-            # 2. 执行向量搜索
+            # 2. 执行向量搜索，低相似度结果在redis中过滤
+            min_similarity = self.min_similarity
             search_results = await curd.vector_search_questions(
                 group_id=request.group_id,
                 query_vector=query_vector,
-                limit=request.limit or 3
+                limit=request.limit or 3,
+                category=request.category,
+                min_similarity=min_similarity
             )
 
-            # 3. 过滤低相似度结果（可选）
-            filtered_results = []
-            min_similarity = 0.5  # 最低相似度阈值
-
-            for result in search_results:
-                similarity = result.get('similarity_score', 0)
-                if similarity >= min_similarity:
-                    filtered_results.append(result)
-                else:
-                    logger.debug(f"过滤低相似度结果: {result.get('question', 'Unknown')} (相似度: {similarity})")
-
-            logger.info(f"查询完成: {request.query} | 原始结果: {len(search_results)}个 | 过滤后: {len(filtered_results)}个")
+            logger.info("查询完成: %s | 结果: %s个", request.query, len(search_results))
 
-            return ApiResponse(
+            return _response_dict(
                 code=200,
                 status="success",
                 message="查询成功",
                 data={
                     "query": request.query,
-                    "results": filtered_results,
-                    "total": len(filtered_results),
+                    "results": search_results,
+                    "total": len(search_results),
                     "search_params": {
                         "min_similarity": min_similarity,
-                        "original_count": len(search_results)
+                        "category": request.category
                     }
                 }
             )
 
         except Exception as e:
-            logger.error(f"查询问题失败: {str(e)}")
-            return ApiResponse(
+            logger.error("查询问题失败: %s", e)
+            return _response_dict(
                 code=500,
                 status="error",
                 message=f"查询失败: {str(e)}"
@@ -464,31 +540,36 @@ class HotspotHandler:
                 )
 
         except Exception as e:
-            logger.error(f"获取问题详情失败: {str(e)}")
+            logger.error("获取问题详情失败: %s", e)
             return ApiResponse(
                 code=500,
                 status="error",
                 message=f"获取失败: {str(e)}"
             )
 
-    async def list_questions(self, group_id: str, limit: int = 50) -> ApiResponse:
-        """获取问题列表"""
+    async def list_questions(
+        self, group_id: str, limit: int = 50, cursor: Optional[int] = None, paginate: bool = False
+    ) -> dict:
+        """获取问题列表，paginate为True时首页返回cursor用于翻页"""
         try:
-            questions = await curd.list_all_questions(group_id=group_id, limit=limit)
+            questions, next_cursor = await curd.list_all_questions(
+                group_id=group_id, limit=limit, cursor_id=cursor, with_cursor=paginate
+            )
 
-            return ApiResponse(
+            return _response_dict(
                 code=200,
                 status="success",
                 message="获取列表成功",
                 data={
                     "questions": questions,
-                    "total": len(questions)
+                    "total": len(questions),
+                    "next_cursor": next_cursor
                 }
             )
 
         except Exception as e:
-            logger.error(f"获取问题列表失败: {str(e)}")
-            return ApiResponse(
+            logger.error("获取问题列表失败: %s", e)
+            return _response_dict(
                 code=500,
                 status="error",
                 message=f"获取列表失败: {str(e)}"
@@ -500,7 +581,7 @@ class HotspotHandler:
             success = await curd.delete_hotspot_question(group_id, question_id)
 
             if success:
-                logger.info(f"成功删除问题: {question_id}")
+                logger.info("成功删除问题: %s", question_id)
                 return ApiResponse(
                     code=200,
                     status="success",
@@ -514,7 +595,7 @@ class HotspotHandler:
                 )
 
         except Exception as e:
-            logger.error(f"删除问题失败: {str(e)}")
+            logger.error("删除问题失败: %s", e)
             return ApiResponse(
                 code=500,
                 status="error",
@@ -534,7 +615,7 @@ class HotspotHandler:
             )
 
         except Exception as e:
-            logger.error(f"获取统计信息失败: {str(e)}")
+            logger.error("获取统计信息失败: %s", e)
             return ApiResponse(
                 code=500,
                 status="error",
@@ -543,4 +624,12 @@ class HotspotHandler:
 
 
 # 创建处理器实例
-hotspot_handler = HotspotHandler()
\ No newline at end of file
+@lru_cache(maxsize=1)
+def _handler_instance() -> HotspotHandler:
+    """进程内唯一的处理器实例，第一次使用时才创建"""
+    return HotspotHandler()
+
+
+async def get_handler() -> HotspotHandler:
+    """供路由通过Depends注入；async依赖直接在事件循环里执行，不会每个请求都切到线程池"""
+    return _handler_instance()
\ No newline at end of file
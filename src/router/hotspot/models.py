@@ -40,6 +40,7 @@ class QueryRequest(BaseModel):
     query: str
     limit: Optional[int] = 3
     group_id: str = Field(..., description='该问题属于的分组，一个公司默认只有一个分组')
+    category: Optional[str] = Field(None, description='可选项，只在该分类内查询')
 
 
 class BatchQueryRequest(BaseModel):
@@ -47,6 +48,7 @@ class BatchQueryRequest(BaseModel):
     queries: List[str] = Field(..., description="查询文本列表")
     limit: Optional[int] = Field(3, description="每个查询返回的结果数量限制")
     group_id: str = Field(..., description="该问题属于的分组，一个公司默认只有一个分组")
+    category: Optional[str] = Field(None, description="可选项，只在该分类内查询")
 
 
 class QueryResult(BaseModel):
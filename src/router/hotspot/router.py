@@ -1,42 +1,49 @@
 """
 热点问题路由下的对外API接口定义
 """
-from fastapi import APIRouter, Body, Query, Path
-from typing import Optional
+from fastapi import APIRouter, Body, Depends, Query, Path
+from fastapi.responses import ORJSONResponse
+from typing import List, Optional
 
 from src.utils.logger import logger
 from src.router.hotspot.models import (
     AddQuestionRequest, AddQuestionBatchRequest, UpdateQuestionRequest,
     QueryRequest, BatchQueryRequest, ApiResponse
 )
-from src.router.hotspot.handler import hotspot_handler
+from src.router.hotspot.handler import HotspotHandler, get_handler
 
 
 router = APIRouter(prefix="/hotspot")
 
 
 @router.post("/questions", response_model=ApiResponse, summary="添加单个热点问题")
-async def add_question(request: AddQuestionRequest):
+async def add_question(
+    request: AddQuestionRequest,
+    handler: HotspotHandler = Depends(get_handler)
+):
     """
     添加单个热点问题
 
     - **question_info**: 问题详细信息
     - **group_id**: 问题所属分组ID（通常对应公司ID）
     """
-    logger.info(f"收到添加问题请求: {request.question_info.question_id}")
-    return await hotspot_handler.add_question(request)
+    logger.info("收到添加问题请求: %s", request.question_info.question_id)
+    return await handler.add_question(request)
 
 
 @router.post("/questions/batch", response_model=ApiResponse, summary="批量添加热点问题")
-async def add_questions_batch(request: AddQuestionBatchRequest):
+async def add_questions_batch(
+    request: AddQuestionBatchRequest,
+    handler: HotspotHandler = Depends(get_handler)
+):
     """
     批量添加热点问题
 
     - **question_info_list**: 问题信息列表
     - **group_id**: 问题所属分组ID
     """
-    logger.info(f"收到批量添加问题请求: {len(request.question_info_list)}个问题")
-    return await hotspot_handler.add_questions_batch(request)
+    logger.info("收到批量添加问题请求: %s个问题", len(request.question_info_list))
+    return await handler.add_questions_batch(request)
 
 
 @router.post("/questions/{question_id}/update", response_model=ApiResponse, summary="更新热点问题")
@@ -44,16 +51,17 @@ async def update_question(
     question_id: str = Path(..., description="要更新的问题ID"),
     question: Optional[str] = Body(None, description="更新的问题内容"),
     standard_reply: Optional[str] = Body(None, description="更新的标准回复"),
-    related_links: Optional[list] = Body(None, description="更新的相关链接"),
-    category: Optional[str] = Body(None, description="更新的问题分类")
+    related_links: Optional[List[str]] = Body(None, description="更新的相关链接"),
+    category: Optional[str] = Body(None, description="更新的问题分类"),
+    handler: HotspotHandler = Depends(get_handler)
 ):
     """
     更新热点问题
 
     可以部分更新问题的字段，传入的字段将被更新，未传入的字段保持不变
     """
-    # 构建更新请求
-    update_request = UpdateQuestionRequest(
+    # 构建更新请求，各字段已由FastAPI校验过，这里不再重复校验
+    update_request = UpdateQuestionRequest.model_construct(
         question_id=question_id,
         question=question,
         standard_reply=standard_reply,
@@ -61,15 +69,14 @@ async def update_question(
         category=category
     )
 
-    logger.info(f"收到更新问题请求: {question_id}")
-    return await hotspot_handler.update_question(update_request)
+    logger.info("收到更新问题请求: %s", question_id)
+    return await handler.update_question(update_request)
 
 
-@router.post("/query/batch", response_model=ApiResponse, summary="批量查询热点问题")
+@router.post("/query/batch", response_model=None, responses={200: {"model": ApiResponse}}, summary="批量查询热点问题")
 async def query_questions_batch(
-    queries: list[str] = Body(..., description="查询文本列表"),
-    group_id: str = Body(..., description="分组ID"),
-    limit: Optional[int] = Body(3, description="每个查询返回的结果数量限制")
+    request: BatchQueryRequest,
+    handler: HotspotHandler = Depends(get_handler)
 ):
     """
     批量查询热点问题，使用batch embedding提高效率
@@ -77,63 +84,79 @@ async def query_questions_batch(
     - **queries**: 查询文本列表
     - **group_id**: 查询范围所属分组ID
     - **limit**: 每个查询返回的结果数量限制（默认3个）
+    - **category**: 可选，只在该分类内查询
     """
-    logger.info(f"收到批量查询请求: {len(queries)} 个查询")
-    return await hotspot_handler.query_questions_batch(queries, group_id, limit)
+    logger.info("收到批量查询请求: %s 个查询", len(request.queries))
+    return ORJSONResponse(await handler.query_questions_batch(
+        request.queries, request.group_id, request.limit or 3, request.category
+    ))
 
 
-@router.post("/query", response_model=ApiResponse, summary="查询热点问题")
-async def query_questions(request: QueryRequest):
+@router.post("/query", response_model=None, responses={200: {"model": ApiResponse}}, summary="查询热点问题")
+async def query_questions(
+    request: QueryRequest,
+    handler: HotspotHandler = Depends(get_handler)
+):
     """
     基于自然语言查询热点问题
 
     - **query**: 查询文本
     - **limit**: 返回结果数量限制（默认3个）
     - **group_id**: 查询范围所属分组ID
+    - **category**: 可选，只在该分类内查询
     """
-    logger.info(f"收到查询请求: {request.query}")
-    return await hotspot_handler.query_questions(request)
+    logger.info("收到查询请求: %s", request.query)
+    return ORJSONResponse(await handler.query_questions(request))
 
 
 @router.get("/questions/{question_id}", response_model=ApiResponse, summary="获取问题详情")
 async def get_question_by_id(
     question_id: str = Path(..., description="问题ID"),
-    group_id: str = Query(..., description="分组ID")
+    group_id: str = Query(..., description="分组ID"),
+    handler: HotspotHandler = Depends(get_handler)
 ):
     """
     根据问题ID获取问题详细信息
     """
-    logger.info(f"收到获取问题详情请求: {question_id}")
-    return await hotspot_handler.get_question_by_id(group_id, question_id)
+    logger.info("收到获取问题详情请求: %s", question_id)
+    return await handler.get_question_by_id(group_id, question_id)
 
 
-@router.get("/questions", response_model=ApiResponse, summary="获取问题列表")
+@router.get("/questions", response_model=None, responses={200: {"model": ApiResponse}}, summary="获取问题列表")
 async def list_questions(
     group_id: str = Query(..., description="分组ID"),
-    limit: int = Query(50, description="返回数量限制", ge=1, le=1000)
+    limit: int = Query(50, description="返回数量限制", ge=1, le=1000),
+    cursor: Optional[int] = Query(None, description="上一页返回的next_cursor，首页不传"),
+    paginate: bool = Query(False, description="需要继续翻页时首页传true，响应中才会返回next_cursor"),
+    handler: HotspotHandler = Depends(get_handler)
 ):
     """
     获取指定分组的所有热点问题列表
+
+    首页传paginate=true时返回next_cursor，不为空时带上它再次请求即可获取下一页；
+    不翻页的请求不会在redis中创建游标
     """
-    logger.info(f"收到获取问题列表请求: group_id={group_id}, limit={limit}")
-    return await hotspot_handler.list_questions(group_id, limit)
+    logger.info("收到获取问题列表请求: group_id=%s, limit=%s, cursor=%s", group_id, limit, cursor)
+    return ORJSONResponse(await handler.list_questions(group_id, limit, cursor, paginate))
 
 
 @router.post("/questions/{question_id}/delete", response_model=ApiResponse, summary="删除热点问题")
 async def delete_question(
     question_id: str = Path(..., description="要删除的问题ID"),
-    group_id: str = Body(..., description="分组ID")
+    group_id: str = Body(..., description="分组ID"),
+    handler: HotspotHandler = Depends(get_handler)
 ):
     """
     删除指定的热点问题
     """
-    logger.info(f"收到删除问题请求: {question_id}")
-    return await hotspot_handler.delete_question(group_id, question_id)
+    logger.info("收到删除问题请求: %s", question_id)
+    return await handler.delete_question(group_id, question_id)
 
 
 @router.get("/stats", response_model=ApiResponse, summary="获取统计信息")
 async def get_stats(
-    group_id: str = Query(..., description="分组ID")
+    group_id: str = Query(..., description="分组ID"),
+    handler: HotspotHandler = Depends(get_handler)
 ):
     """
     获取指定分组的统计信息
@@ -143,8 +166,8 @@ async def get_stats(
     - 各分类问题数量
     - 索引状态等
     """
-    logger.info(f"收到获取统计信息请求: group_id={group_id}")
-    return await hotspot_handler.get_stats(group_id)
+    logger.info("收到获取统计信息请求: group_id=%s", group_id)
+    return await handler.get_stats(group_id)
 
 
 # 健康检查接口
@@ -166,7 +189,7 @@ async def create_index(
     """
     from src.dbs.redis_stack import curd
 
-    logger.info(f"收到创建索引请求: {group_id}")
+    logger.info("收到创建索引请求: %s", group_id)
 
     try:
         success = await curd.create_hotspot_index(group_id)
@@ -183,7 +206,7 @@ async def create_index(
                 message=f"索引 {group_id} 创建失败"
             )
     except Exception as e:
-        logger.error(f"创建索引失败: {str(e)}")
+        logger.error("创建索引失败: %s", e)
         return ApiResponse(
             code=500,
             status="error",
@@ -1,3 +1,6 @@
+import os
+
+
 class MyConfig:
 
     def __init__(self, nacos_cfg):
@@ -10,7 +13,9 @@ class MyConfig:
 
     def get_redis_config(self):
         """获取redis的配置"""
-        return {"host": "120.232.79.83", "port": 26379, "db": 0, 'password':'redispass'}
+        return {"host": "120.232.79.83", "port": 26379, "db": 0, 'password':'redispass',
+                # 向量索引的存储精度，FLOAT16比FLOAT32省一半内存
+                "vector_type": "FLOAT16"}
 
     def get_milvus_config(self):
         """获取Milvus的配置"""
@@ -25,12 +30,33 @@ class MyConfig:
         return {
             "embedding": {
                 "model": "BAAI/bge-m3",
-                "base_url": "http://10.33.0.167:8100/v1",
+                "base_url": "http://127.0.0.1:8100/v1",  # 本地vLLM的OpenAI兼容接口
                 "api_key": "empty",
-                "n_dim":1024
+                "n_dim":1024,
+                # 批量向量化时按文本长度(字符数)分桶的上界，超过最后一个上界的单独成桶
+                "length_bins": [64, 256, 1024],
+                # 查询结果的最低相似度阈值
+                "min_similarity": 0.5
             },
             "rerank": None,
         }
 
+    def get_server_config(self):
+        """获取uvicorn服务的配置"""
+        return {
+            # 异步服务单个worker就能处理大量并发，每个worker各自有redis连接池、编码进程池和向量缓存，
+            # 并且worker越多微批处理越难凑满，所以默认只开少量worker；容器内可以用APP_WORKERS按分配的CPU调整
+            "workers": int(os.environ.get("APP_WORKERS", 2)),
+        }
+
+    def get_process_pool_config(self):
+        """获取批量编码进程池的配置"""
+        return {
+            # 每个uvicorn worker各自一个进程池，总进程数是 worker数 x max_workers，所以保持很小
+            "max_workers": 2,
+            # worker进程里已经有日志线程和事件循环，不用fork直接复制，子进程从forkserver/spawn干净启动
+            "start_method": "forkserver",
+        }
+
 
 my_config = MyConfig({})
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+微批处理器: 把短时间窗口内的并发调用合并成一批统一处理
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+
+
+class MicroBatcher:
+    """
+    并发调用方把请求放进队列，后台任务在max_wait秒内尽量凑满max_batch_size个，
+    然后一次性交给process_batch处理，再把结果按顺序分发回各自的Future。
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+    ):
+        """
+        :param process_batch: 批处理函数，输入请求列表，返回等长的结果列表；
+                              结果中的Exception实例会作为对应调用方的异常抛出
+        :param max_batch_size: 单批最大请求数
+        :param max_wait: 收到第一个请求后最多等待的秒数
+        """
+        self._process_batch = process_batch
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._inflight = set()
+
+    async def submit(self, item: Any) -> Any:
+        """提交一个请求并等待它所在批次的处理结果"""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    def _ensure_worker(self):
+        """后台任务在第一次调用时按当前事件循环懒启动"""
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            self._drain(batch)
+            if len(batch) < self._max_batch_size:
+                await asyncio.sleep(self._max_wait)
+                self._drain(batch)
+
+            # 批次之间互不阻塞，上一批还在执行时下一批可以继续凑
+            task = self._loop.create_task(self._dispatch(batch))
+            self._inflight.add(task)
+            task.add_done_callback(self._inflight.discard)
+
+    def _drain(self, batch: list):
+        while len(batch) < self._max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+
+    async def _dispatch(self, batch: list):
+        # 已经被取消的调用方不再处理
+        pending = [(item, future) for item, future in batch if not future.done()]
+        if not pending:
+            return
+
+        try:
+            results = await self._process_batch([item for item, _ in pending])
+        except Exception as e:
+            for _, future in pending:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(pending, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def close(self):
+        """停止后台任务"""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
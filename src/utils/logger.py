@@ -2,102 +2,601 @@
 封装Logger模块,增加了容器内的logs文件输出和warnning和error时的调用栈打印
 """
 
+import os
 import sys
+import time
+import atexit
 import logging
+import threading
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows上没有fcntl，轮转时不加文件锁
+    fcntl = None
 
-class LoggerWrapper:
-    """
-    一个日志记录器的封装类，旨在简化日志配置并为错误日志自动添加堆栈跟踪。
-    """
-
-    def __init__(self, name, level=logging.DEBUG, log_file=None):
-        """
-        初始化日志记录器。
-
-        :param name: 日志记录器的名称，通常使用 __name__。
-        :param level: 日志记录的级别，默认为 DEBUG。
-        :param log_file: (可选) 日志输出的文件路径。如果指定，日志将同时输出到控制台和文件。
-        """
-        # 1. 创建一个 logger 实例
-        # getLogger(name) 返回一个具有指定名称的 logger 实例，如果不存在则会创建。
-        self.logger = logging.getLogger(name)
-        self.logger.setLevel(level)
-
-        # 2. 创建一个 Formatter 来定义日志格式
-        # %(asctime)s: 日志创建时间
-        # %(name)s: logger 的名称
-        # %(levelname)s: 日志级别 (e.g., DEBUG, INFO, ERROR)
-        # %(message)s: 日志消息
-        formatter = logging.Formatter(
-            "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-        )
-
-        # 3. 创建并配置 Handlers
-        # 避免重复添加 handlers
-        if not self.logger.handlers:
-            # --- 控制台日志处理器 ---
-            console_handler = logging.StreamHandler(sys.stdout)
-            console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
-
-            final_log_path = None
-            if log_file is False:
-                # 禁用文件日志
-                pass
-            elif isinstance(log_file, str):
-                # 用户提供了自定义路径
-                final_log_path = Path(log_file)
-            else:  # log_file is None (默认情况)
-                # 使用 pathlib 获取项目根目录 (即当前工作目录)
-                project_root = Path.cwd()
-                # 定义默认的日志路径
-                log_dir = project_root / "logs"
-                # 创建目录 (如果不存在)
-                log_dir.mkdir(parents=True, exist_ok=True)
-                # 定义完整的日志文件路径
-                final_log_path = log_dir / f"{name}.log"
-
-            # 如果最终的日志路径有效，则添加 FileHandler
-            if final_log_path:
-                # 'a' 表示追加模式, 'utf-8' 确保正确处理各种字符
-                file_handler = logging.FileHandler(
-                    final_log_path, mode="a", encoding="utf-8"
-                )
-                file_handler.setFormatter(formatter)
-                self.logger.addHandler(file_handler)
-
-    def debug(self, msg, *args, **kwargs):
-        """记录一条 DEBUG 级别的日志。"""
-        self.logger.debug(msg, *args, **kwargs)
-
-    def info(self, msg, *args, **kwargs):
-        """记录一条 INFO 级别的日志。"""
-        self.logger.info(msg, *args, **kwargs)
-
-    def warning(self, msg, *args, **kwargs):
-        """记录一条 WARNING 级别的日志。"""
-        self.logger.error("%s%s%s", "━━" * 10, "WARNING" * 4, "━━" * 10)
-        self.logger.warning(msg, *args, exc_info=True, **kwargs)
-
-    def error(self, msg, *args, **kwargs):
-        """
-        记录一条 ERROR 级别的日志。
-        关键点：在调用 logger.error 时，我们设置 exc_info=True。
-        这会使得 logging 模块自动捕获并记录异常堆栈信息。
-        这个方法应该在 `except` 块中调用，以正确捕获异常。
-        """
-        # exc_info=True 会自动添加异常信息到日志消息中 [7, 8]
-        self.logger.error("%s%s%s", "━━" * 10, "ERROR" * 4, "━━" * 10)
-        self.logger.error(msg, *args, exc_info=True, **kwargs)
-
-    def critical(self, msg, *args, **kwargs):
-        """
-        记录一条 CRITICAL 级别的日志，同样自动附带堆栈信息。
-        """
-        self.logger.error("%s%s%s", "━━" * 10, "we are done" * 4, "━━" * 10)    # ! 这种基本基本都是很严重的程度，但是agent服务做好权限管理的话，一般不会用的这个
-        self.logger.critical(msg, *args, exc_info=True, **kwargs)
-
-
-logger = LoggerWrapper(__name__)
\ No newline at end of file
+
+# 日志格式
+# %(asctime)s: 日志创建时间
+# %(name)s: logger 的名称
+# %(levelname)s: 日志级别 (e.g., DEBUG, INFO, ERROR)
+# %(message)s: 日志消息
+LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+
+class FastFormatter(logging.Formatter):
+    """
+    asctime按秒缓存的Formatter：同一秒内的记录复用已经格式化好的时间字符串，
+    只拼接毫秒部分。格式为LOG_FORMAT时，" - name - LEVEL - "前缀按(name, levelname)缓存，
+    直接拼接字符串，不经过%-style的格式化。各个写日志的线程会同时调用，
+    秒级缓存以(秒, 字符串)元组整体替换，前缀缓存只做单次字典赋值，都不需要加锁。
+    """
+
+    def __init__(self, fmt=LOG_FORMAT, *args, **kwargs):
+        super().__init__(fmt, *args, **kwargs)
+        self._last = (None, "")
+        self._prefixes = {}
+
+    def formatTime(self, record, datefmt=None):
+        if datefmt:
+            return super().formatTime(record, datefmt)
+        return f"{self._second_str(int(record.created))},{int(record.msecs):03d}"
+
+    def format_created(self, created: float) -> str:
+        """不经过LogRecord，直接按时间戳生成asctime，供预编码的分隔行使用"""
+        sec = int(created)
+        return f"{self._second_str(sec)},{int((created - sec) * 1000):03d}"
+
+    def _second_str(self, sec: int) -> str:
+        last = self._last
+        if last[0] == sec:
+            return last[1]
+        s = time.strftime(self.default_time_format, self.converter(sec))
+        self._last = (sec, s)
+        return s
+
+    def format(self, record):
+        if self._fmt != LOG_FORMAT:
+            return super().format(record)
+
+        record.message = record.getMessage()
+        prefix = self._prefixes.get((record.name, record.levelname))
+        if prefix is None:
+            prefix = self._prefixes[(record.name, record.levelname)] = f" - {record.name} - {record.levelname} - "
+        s = self.formatTime(record) + prefix + record.message
+
+        # 异常堆栈和stack_info的处理与logging.Formatter.format一致
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            if s[-1:] != "\n":
+                s = s + "\n"
+            s = s + record.exc_text
+        if record.stack_info:
+            if s[-1:] != "\n":
+                s = s + "\n"
+            s = s + self.formatStack(record.stack_info)
+        return s
+
+
+_FORMATTER = FastFormatter()
+
+
+def is_container() -> bool:
+    """是否运行在容器里：docker会在根目录放/.dockerenv，k8s会注入KUBERNETES_SERVICE_HOST"""
+    return os.path.exists("/.dockerenv") or "KUBERNETES_SERVICE_HOST" in os.environ
+
+
+# DISABLE_FILE_LOG=1 时不写默认的日志文件，只输出到控制台(由容器/编排平台从stdout收集)；
+# DISABLE_FILE_LOG=auto 时只在容器里关闭。显式传入log_file路径的logger不受影响
+_DISABLE_FILE_LOG = os.environ.get("DISABLE_FILE_LOG", "")
+FILE_LOG_DISABLED = _DISABLE_FILE_LOG == "1" or (_DISABLE_FILE_LOG == "auto" and is_container())
+
+# 默认的日志目录(项目根目录，即当前工作目录下的logs)，导入时只确定路径，第一次写文件时才创建
+_LOG_DIR = Path.cwd() / "logs"
+
+
+@lru_cache(maxsize=None)
+def _ensure_dir(path: str):
+    """每个日志目录在进程内只mkdir一次"""
+    os.makedirs(path, exist_ok=True)
+
+# warning/error/critical前面的醒目分隔行，只拼接一次
+_WARN_BANNER = "━━" * 10 + "WARNING" * 4 + "━━" * 10
+_ERR_BANNER = "━━" * 10 + "ERROR" * 4 + "━━" * 10
+_CRIT_BANNER = "━━" * 10 + "we are done" * 4 + "━━" * 10
+
+
+class _Banner:
+    """
+    按logger名称预先拼好(并编码好)的分隔行，除了asctime之外的部分都是固定的。
+    分隔行以(_Banner, 时间戳)的形式直接放进线程缓冲，不创建LogRecord，也不经过Formatter。
+    """
+    __slots__ = ("name", "text", "data")
+
+    def __init__(self, name, banner):
+        self.name = name
+        self.text = f" - {name} - ERROR - {banner}\n"
+        self.data = self.text.encode("utf-8")
+
+
+class _Line:
+    """调用方线程里已经格式化好的一条日志，监听线程只负责写出"""
+    __slots__ = ("name", "levelno", "text", "data")
+
+    def __init__(self, name, levelno, text):
+        self.name = name
+        self.levelno = levelno
+        self.text = text
+        self.data = text.encode("utf-8")
+
+
+# 每个写日志的线程各自一个待写列表，追加时不加锁；监听线程定时把各列表里的内容取走
+_thread_local = threading.local()
+_thread_buffers = []
+_BUFFERS_LOCK = threading.Lock()
+
+
+def _thread_buffer() -> list:
+    """当前线程的待写列表，第一次调用时创建并登记"""
+    buf = getattr(_thread_local, "buf", None)
+    if buf is None:
+        buf = _thread_local.buf = []
+        with _BUFFERS_LOCK:
+            _thread_buffers.append((threading.current_thread(), buf))
+    return buf
+
+
+class _ThreadBufferHandler(logging.Handler):
+    """
+    在调用方线程里完成格式化和编码，把_Line追加到本线程的待写列表，不经过共享队列。
+    格式化的开销分摊到各个写日志的线程，监听线程只负责收集和写出。
+    """
+
+    def handle(self, record):
+        # 只往本线程自己的列表里追加，不需要Handler默认的加锁
+        rv = self.filter(record)
+        if rv:
+            self.emit(rv if isinstance(rv, logging.LogRecord) else record)
+        return rv
+
+    def emit(self, record):
+        try:
+            _thread_buffer().append(_Line(record.name, record.levelno, self.format(record) + "\n"))
+        except RecursionError:
+            raise
+        except Exception:
+            self.handleError(record)
+
+
+def _live_exc_info():
+    """当前正在处理的异常；不在except块中时返回False，避免logging去取空的调用栈"""
+    exc = sys.exc_info()
+    return exc if exc[0] is not None else False
+
+
+def _handle_error(handler, name, levelno, msg):
+    """
+    后台线程里的写入异常和emit一样交给handler.handleError报告(打印到stderr)，不向上抛，
+    避免监听/刷新线程因为一次写失败(比如日志目录不可写)而退出。需要在except块中调用。
+    """
+    handler.handleError(logging.makeLogRecord(
+        {"name": name, "levelno": levelno, "levelname": logging.getLevelName(levelno), "msg": msg}
+    ))
+
+
+class _RouteHandler(logging.Handler):
+    """按logger名称把日志记录分发给各自的文件handler，只在监听线程中被调用"""
+
+    def __init__(self):
+        super().__init__()
+        self.routes = {}
+
+    def handle_banner(self, asctime, banner):
+        handler = self.routes.get(banner.name)
+        if handler is not None:
+            handler.raw_write(asctime.encode("utf-8") + banner.data)
+
+    def handle_line(self, line):
+        handler = self.routes.get(line.name)
+        if handler is not None:
+            handler.raw_write(line.data, line.levelno >= handler.flush_level)
+
+
+# os.writev只在POSIX上可用，单次调用的缓冲区个数受IOV_MAX限制
+_writev = getattr(os, "writev", None)
+try:
+    _IOV_MAX = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    _IOV_MAX = 1024
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
+def _write_all(fd, data):
+    with memoryview(data) as view:
+        written = 0
+        while written < len(view):
+            written += os.write(fd, view[written:])
+
+
+class RawFileHandler(logging.Handler):
+    """
+    直接写文件描述符的handler，绕开TextIOWrapper和BufferedWriter两层缓冲。
+    调用方线程里已经编码好的行通过raw_write放进待写列表，只有ERROR及以上的记录、攒够buffer_size或后台线程定时刷新时才落盘，
+    落盘时用一次os.writev把整批记录写出去，不需要先拼接成一整块。文件以O_APPEND打开，每次写入都是追加写。
+    文件超过max_bytes时按RotatingFileHandler的规则轮转：xxx.log -> xxx.log.1 -> ... -> xxx.log.{backup_count}。
+    多个uvicorn worker会追加写同一个文件：文件大小每次落盘前用fstat读取(包含其他进程的写入)，
+    轮转在xxx.log.lock的文件锁内进行并在拿到锁后重新确认；文件已经被其他进程轮转走时只重新打开，不重复重命名。
+    delay为True时(默认)和FileHandler一样推迟到第一次落盘才创建目录、打开文件，从不写日志的logger不占用fd。
+    """
+
+    def __init__(self, filename, buffer_size=256 * 1024, flush_level=logging.ERROR,
+                 max_bytes=64 * 1024 * 1024, backup_count=5, delay=True):
+        super().__init__()
+        self.baseFilename = os.path.abspath(filename)
+        self.buffer_size = buffer_size
+        self.flush_level = flush_level
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.buffer = []
+        self.buffered_bytes = 0
+        self.closed = False
+        self.fd = None
+        if not delay:
+            self._open()
+
+    def _open(self):
+        _ensure_dir(os.path.dirname(self.baseFilename))
+        self.fd = os.open(self.baseFilename, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _reopen(self):
+        os.close(self.fd)
+        self._open()
+
+    def _rotated_elsewhere(self) -> bool:
+        """当前打开的文件是否已经不在baseFilename上(被其他进程轮转或删除)"""
+        try:
+            st = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return True
+        own = os.fstat(self.fd)
+        return (st.st_dev, st.st_ino) != (own.st_dev, own.st_ino)
+
+    def _needs_rotate(self) -> bool:
+        size = os.fstat(self.fd).st_size
+        return size > 0 and size + self.buffered_bytes > self.max_bytes
+
+    def _maybe_rotate(self):
+        if self._rotated_elsewhere():
+            self._reopen()
+        if not self._needs_rotate():
+            return
+
+        lock_fd = os.open(self.baseFilename + ".lock", os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            # 等锁期间其他进程可能已经完成了轮转
+            if self._rotated_elsewhere():
+                self._reopen()
+            elif self._needs_rotate():
+                self._rotate()
+        finally:
+            # 关闭fd同时释放flock
+            os.close(lock_fd)
+
+    def _rotate(self):
+        """关闭当前文件，依次把旧文件后缀加一，超出backup_count的最旧文件被覆盖，再重新打开一个空文件"""
+        os.close(self.fd)
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.baseFilename}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.baseFilename}.{i + 1}")
+        os.replace(self.baseFilename, f"{self.baseFilename}.1")
+        self._open()
+
+    def _write_buffer(self):
+        """把待写的记录写入文件，调用方需持有self.lock"""
+        if not self.buffer or self.closed:
+            return
+        try:
+            if self.fd is None:
+                self._open()
+            # backup_count为0时和RotatingFileHandler一样不轮转
+            if self.max_bytes > 0 and self.backup_count > 0:
+                self._maybe_rotate()
+            if _writev is None:
+                _write_all(self.fd, b"".join(self.buffer))
+            else:
+                for start in range(0, len(self.buffer), _IOV_MAX):
+                    chunks = self.buffer[start:start + _IOV_MAX]
+                    written = _writev(self.fd, chunks)
+                    if written < sum(map(len, chunks)):
+                        # 极少出现的短写，剩余部分逐段补写
+                        _write_all(self.fd, b"".join(chunks)[written:])
+        finally:
+            # 写失败时丢弃这一批，异常交给调用方报告，缓冲区不会因为文件一直不可写而无限增长
+            self.buffer.clear()
+            self.buffered_bytes = 0
+
+    def raw_write(self, data: bytes, flush: bool = False):
+        """直接追加已经编码好的一行，不经过Formatter；flush为True时立即落盘"""
+        with self.lock:
+            self.buffer.append(data)
+            self.buffered_bytes += len(data)
+            if flush or self.buffered_bytes >= self.buffer_size:
+                self._write_buffer()
+
+    def flush(self):
+        # 定时刷新线程和监听线程会同时访问缓冲区
+        with self.lock:
+            self._write_buffer()
+
+    def close(self):
+        with self.lock:
+            self._write_buffer()
+            self.closed = True
+            if self.fd is not None:
+                os.close(self.fd)
+                self.fd = None
+        super().close()
+
+
+# 缓冲文件handler的定时刷新间隔(秒)
+FLUSH_INTERVAL = 30
+
+_buffered_handlers = []
+_flush_stop = threading.Event()
+
+# 同一个日志文件只打开一次：按解析后的路径缓存handler，多个logger共用同一个fd和缓冲区
+_HANDLER_CACHE = {}
+_CACHE_LOCK = threading.Lock()
+
+
+def _get_file_handler(log_path: Path) -> logging.Handler:
+    """获取(必要时创建)写入log_path的缓冲文件handler"""
+    key = log_path.resolve()
+    with _CACHE_LOCK:
+        handler = _HANDLER_CACHE.get(key)
+        if handler is None:
+            # 以追加模式打开，记录统一按utf-8编码写入
+            handler = RawFileHandler(log_path)
+            _HANDLER_CACHE[key] = handler
+            _buffered_handlers.append(handler)
+        return handler
+
+
+def _flush_loop():
+    while not _flush_stop.wait(FLUSH_INTERVAL):
+        for handler in list(_buffered_handlers):
+            try:
+                handler.flush()
+            except Exception:
+                _handle_error(handler, __name__, logging.ERROR, f"flush {handler.baseFilename} failed")
+
+
+class _ConsoleHandler(logging.StreamHandler):
+    """控制台handler：逐条写入但不逐条flush，由监听线程在每批记录处理完后flush一次"""
+
+    def handle_banner(self, asctime, banner):
+        with self.lock:
+            self.stream.write(asctime + banner.text)
+
+    def handle_line(self, line):
+        with self.lock:
+            self.stream.write(line.text)
+
+    end_batch = logging.StreamHandler.flush
+
+
+# 监听线程收集各线程待写列表的间隔(秒)
+DRAIN_INTERVAL = 0.01
+
+
+class _BufferListener:
+    """每隔DRAIN_INTERVAL把各线程待写列表里的日志取走交给handler写出，处理完一轮后再通知各handler收尾"""
+
+    def __init__(self, *handlers):
+        self.handlers = handlers
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="log-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监听线程，退出前把剩余的日志全部写出"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(DRAIN_INTERVAL):
+            self._drain()
+        self._drain()
+
+    def _drain(self):
+        with _BUFFERS_LOCK:
+            buffers = list(_thread_buffers)
+
+        drained = dead = False
+        for thread, buf in buffers:
+            n = len(buf)
+            if not n:
+                dead = dead or not thread.is_alive()
+                continue
+            # 只删除已经取走的前n条，这期间调用方新追加的留到下一轮
+            items = buf[:n]
+            del buf[:n]
+            drained = True
+            for item in items:
+                if item.__class__ is _Line:
+                    self._handle_line(item)
+                else:
+                    self._handle_banner(*item)
+
+        if drained:
+            for handler in self.handlers:
+                end_batch = getattr(handler, "end_batch", None)
+                if end_batch is not None:
+                    try:
+                        end_batch()
+                    except Exception:
+                        _handle_error(handler, __name__, logging.ERROR, "end_batch failed")
+        if dead:
+            # 已退出且内容已写完的线程不再登记
+            with _BUFFERS_LOCK:
+                _thread_buffers[:] = [(t, b) for t, b in _thread_buffers if b or t.is_alive()]
+
+    # 每条记录、每个handler单独捕获异常：一个handler写失败不影响其他handler，也不会让监听线程退出
+    def _handle_line(self, line):
+        for handler in self.handlers:
+            try:
+                handler.handle_line(line)
+            except Exception:
+                _handle_error(handler, line.name, line.levelno, line.text)
+
+    def _handle_banner(self, banner, created):
+        asctime = _FORMATTER.format_created(created)
+        for handler in self.handlers:
+            try:
+                handler.handle_banner(asctime, banner)
+            except Exception:
+                _handle_error(handler, banner.name, logging.ERROR, banner.text)
+
+
+# 所有get_logger创建的logger共享一个后台监听线程：
+# 调用方格式化好后追加到本线程的列表，控制台/文件的写入都在监听线程里完成
+_buffer_handler = _ThreadBufferHandler()
+_buffer_handler.setFormatter(_FORMATTER)
+_console_handler = _ConsoleHandler(sys.stdout)
+_route_handler = _RouteHandler()
+_listener = _BufferListener(_console_handler, _route_handler)
+_listener.start()
+_flush_thread = threading.Thread(target=_flush_loop, name="log-flusher", daemon=True)
+_flush_thread.start()
+
+
+def _shutdown():
+    """进程退出时先排空队列，再把缓冲区里剩余的日志写入文件"""
+    _listener.stop()
+    _flush_stop.set()
+    for handler in _buffered_handlers:
+        try:
+            handler.flush()
+        except Exception:
+            _handle_error(handler, __name__, logging.ERROR, f"flush {handler.baseFilename} failed")
+
+
+atexit.register(_shutdown)
+
+
+# LOG_FORMAT不含filename/lineno/funcName，不需要findCaller逐帧回溯查找调用位置
+_UNKNOWN_CALLER = ("(unknown file)", 0, "(unknown function)", None)
+
+
+def _skip_find_caller(logger):
+    """返回替换logger.findCaller的函数：只有显式要求stack_info时才走标准库的栈帧遍历"""
+    find_caller = logger.findCaller
+
+    def _find_caller(stack_info=False, stacklevel=1):
+        if stack_info:
+            return find_caller(stack_info, stacklevel)
+        return _UNKNOWN_CALLER
+
+    return _find_caller
+
+
+class BannerFilter(logging.Filter):
+    """
+    挂在logger上的Filter，在调用方线程里处理WARNING及以上的记录：
+    1. 在记录前面先放一行醒目的分隔行(按名称和级别预先拼好)，和记录进同一个线程缓冲，顺序不会乱；
+    2. ERROR/CRITICAL在except块中调用且没有传入exc_info时，自动附带当前异常的堆栈；不在except块中时不附带。
+    """
+
+    def __init__(self, name=""):
+        super().__init__(name)
+        self._banners = {}
+
+    def filter(self, record):
+        levelno = record.levelno
+        if levelno < logging.WARNING:
+            return True
+
+        banner = self._banners.get((record.name, levelno))
+        if banner is None:
+            if levelno >= logging.CRITICAL:
+                text = _CRIT_BANNER
+            elif levelno >= logging.ERROR:
+                text = _ERR_BANNER
+            else:
+                text = _WARN_BANNER
+            banner = self._banners[(record.name, levelno)] = _Banner(record.name, text)
+        _thread_buffer().append((banner, record.created))
+
+        # 标准库在没有传exc_info时记录为None，显式传入exc_info=False时保留False，不附带堆栈
+        if levelno >= logging.ERROR and record.exc_info is None:
+            record.exc_info = _live_exc_info()
+        return True
+
+
+_BANNER_FILTER = BannerFilter()
+
+
+def get_logger(name, level=logging.DEBUG, log_file=None) -> logging.Logger:
+    """
+    获取一个配置好的标准库logger，调用方直接使用logging.Logger的方法，不再经过一层封装。
+
+    :param name: 日志记录器的名称，通常使用 __name__。
+    :param level: 日志记录的级别，默认为 DEBUG。
+    :param log_file: (可选) 日志输出的文件路径。默认写入logs/{name}.log，传入False时只输出到控制台。
+    """
+    lg = logging.getLogger(name)
+    lg.setLevel(level)
+    # 避免重复添加 handlers
+    if not lg.handlers:
+        _configure(lg, name, log_file)
+    return lg
+
+
+def log_lazy(lg: logging.Logger, level, producer, *args, **kwargs):
+    """
+    按需生成日志内容：producer可以是返回消息的可调用对象，只有该级别开启时才会被调用。
+    普通调用请使用 logger.info("xxx: %s", value) 的形式，参数同样只在需要输出时才格式化。
+    """
+    if lg.isEnabledFor(level):
+        lg.log(level, producer() if callable(producer) else producer, *args, **kwargs)
+
+
+def _configure(lg, name, log_file):
+    # --- logger上只挂线程缓冲handler，控制台输出由共享的监听线程负责 ---
+    lg.addHandler(_buffer_handler)
+    lg.addFilter(_BANNER_FILTER)
+    # 已经由自己的handler输出，不再向上传给root或上级logger，避免同一条日志重复输出
+    lg.propagate = False
+    # 每条日志都会调用findCaller遍历sys._getframe，输出格式用不到调用位置，直接跳过
+    lg.findCaller = _skip_find_caller(lg)
+
+    final_log_path = None
+    if log_file is None and FILE_LOG_DISABLED:
+        log_file = False
+    if log_file is False:
+        # 禁用文件日志
+        pass
+    elif isinstance(log_file, str):
+        # 用户提供了自定义路径
+        final_log_path = Path(log_file)
+    else:  # log_file is None (默认情况)
+        # 定义完整的日志文件路径
+        final_log_path = _LOG_DIR / f"{name}.log"
+
+    # 如果最终的日志路径有效，则为该logger注册 FileHandler，由监听线程写入
+    if final_log_path:
+        _route_handler.routes[name] = _get_file_handler(final_log_path)
+
+
+logger = get_logger(__name__)
@@ -0,0 +1,45 @@
+"""
+进程池封装: CPU密集的批量编码放到子进程执行，避免占住事件循环所在进程的GIL
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from src.service.config import my_config
+
+
+class ProcessPool:
+    """在应用启动时创建、关闭时销毁的全局进程池"""
+
+    executor: Optional[ProcessPoolExecutor]
+
+    def __init__(self, max_workers: Optional[int] = None, start_method: Optional[str] = None):
+        cfg = my_config.get_process_pool_config()
+        self.max_workers = max_workers or cfg.get("max_workers", 2)
+        self.start_method = start_method or cfg.get("start_method", "forkserver")
+        self.executor = None
+
+    def start(self):
+        """创建进程池，重复调用不会重复创建"""
+        if self.executor is None:
+            # 当前平台不支持forkserver时(例如Windows)退回spawn
+            method = self.start_method
+            if method not in multiprocessing.get_all_start_methods():
+                method = "spawn"
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(method)
+            )
+
+    def get_executor(self) -> Optional[ProcessPoolExecutor]:
+        """获取进程池，未启动时返回None"""
+        return self.executor
+
+    def shutdown(self):
+        """关闭进程池"""
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+
+process_pool = ProcessPool()